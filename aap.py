@@ -1,13 +1,52 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 from io import BytesIO
 import base64
 import os
 import hashlib
 import time
 import uuid
+import threading
+import functools
+import json
+import random
+import gzip
+import shutil
+import re
+import unicodedata
+import cProfile
+import pstats
+import logging
+from logging.handlers import RotatingFileHandler
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# PyArrow é opcional: sem ele as análises leem sempre diretamente do SQLite
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# DuckDB é opcional: motor analítico alternativo selecionado por HPO_ANALYTICS_BACKEND=duckdb
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+# fcntl só existe em sistemas POSIX: sem ele os snapshots são protegidos apenas dentro do processo
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # Configuração da página para mobile
 st.set_page_config(
@@ -136,37 +175,502 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Caminho do banco de dados (pode ser alterado pela variável de ambiente HPO_DB_PATH)
+DB_PATH = os.environ.get('HPO_DB_PATH', 'hpo_survey.db')
+# Modo do diário das bases de dados de respostas. Em WAL as leituras (painéis, cópias de segurança) não bloqueiam
+# as gravações; 'delete' repõe o diário de rollback (necessário, por exemplo, numa partilha de rede)
+JOURNAL_MODE = os.environ.get('HPO_JOURNAL_MODE', 'wal').lower()
+
+# Número de medições mantidas por função no histograma de desempenho
+PERF_WINDOW = 1000
+# Número de chamadas mais lentas mantidas para consulta
+PERF_SLOWEST = 25
+
+# Registo de tempos de execução partilhado por todas as sessões do processo
+@st.cache_resource
+def get_perf_registry():
+    return {
+        'lock': threading.Lock(),
+        'timings': {},
+        'counts': {},
+        'slowest': []
+    }
+
+PERF_REGISTRY = get_perf_registry()
+
+# Função para registar a duração de uma chamada no registo de desempenho
+def record_timing(name, seconds):
+    with PERF_REGISTRY['lock']:
+        if name not in PERF_REGISTRY['timings']:
+            PERF_REGISTRY['timings'][name] = deque(maxlen=PERF_WINDOW)
+            PERF_REGISTRY['counts'][name] = 0
+        PERF_REGISTRY['timings'][name].append(seconds)
+        PERF_REGISTRY['counts'][name] += 1
+        
+        slowest = PERF_REGISTRY['slowest']
+        if len(slowest) < PERF_SLOWEST or seconds > slowest[-1][1]:
+            slowest.append((name, seconds, datetime.now()))
+            slowest.sort(key=lambda item: item[1], reverse=True)
+            del slowest[PERF_SLOWEST:]
+
+# Gestor de contexto para medir o tempo de um bloco de código
+@contextmanager
+def timed_block(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
+
+# Decorador para medir o tempo de execução de uma função
+def timed(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed_block(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+# Função para obter o resumo do registo de desempenho (contagens e percentis)
+def get_perf_summary():
+    with PERF_REGISTRY['lock']:
+        timings = {name: list(values) for name, values in PERF_REGISTRY['timings'].items()}
+        counts = dict(PERF_REGISTRY['counts'])
+        slowest = list(PERF_REGISTRY['slowest'])
+    
+    rows = []
+    for name, values in timings.items():
+        series = pd.Series(values) * 1000
+        rows.append({
+            'Função': name,
+            'Chamadas': counts[name],
+            'p50 (ms)': series.quantile(0.50),
+            'p95 (ms)': series.quantile(0.95),
+            'p99 (ms)': series.quantile(0.99),
+            'Máximo (ms)': series.max()
+        })
+    
+    summary_df = pd.DataFrame(rows, columns=['Função', 'Chamadas', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Máximo (ms)'])
+    summary_df = summary_df.sort_values('p95 (ms)', ascending=False).reset_index(drop=True)
+    
+    slowest_df = pd.DataFrame(
+        [(name, seconds * 1000, when.strftime('%d/%m/%Y %H:%M:%S')) for name, seconds, when in slowest],
+        columns=['Função', 'Duração (ms)', 'Momento']
+    )
+    
+    return summary_df, slowest_df
+
+# Função para limpar o registo de desempenho
+def reset_perf_registry():
+    with PERF_REGISTRY['lock']:
+        PERF_REGISTRY['timings'].clear()
+        PERF_REGISTRY['counts'].clear()
+        PERF_REGISTRY['slowest'].clear()
+
+# Limite (em milissegundos) a partir do qual uma consulta é registada como lenta
+SLOW_QUERY_MS = float(os.environ.get('HPO_SLOW_QUERY_MS', '100'))
+# Ficheiro do registo de consultas lentas (rodado a cada 5 MB, mantendo 5 ficheiros)
+SLOW_QUERY_LOG = os.environ.get('HPO_SLOW_QUERY_LOG', 'slow_queries.log')
+# Número de consultas distintas mantidas no resumo de consultas lentas
+SLOW_QUERY_TOP = 50
+
+# Registo de consultas lentas partilhado por todas as sessões do processo
+@st.cache_resource
+def get_slow_query_registry():
+    logger = logging.getLogger('hpo.slow_queries')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(SLOW_QUERY_LOG, maxBytes=5 * 1024 * 1024, backupCount=5, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    
+    return {
+        'lock': threading.Lock(),
+        'logger': logger,
+        'queries': {}
+    }
+
+SLOW_QUERY_REGISTRY = get_slow_query_registry()
+
+# Função para descrever os parâmetros de uma consulta sem expor os valores
+def describe_params(params):
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+# Função para obter o plano de execução (EXPLAIN QUERY PLAN) de uma consulta
+def explain_query(conn, sql, params):
+    if sql.split(None, 1)[0].upper() not in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE'):
+        return []
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+        return [row[-1] for row in rows]
+    except sqlite3.Error as e:
+        return [f"Plano indisponível: {e}"]
+
+# Função para registar uma consulta lenta no ficheiro e no resumo em memória
+def record_slow_query(conn, sql, params, seconds):
+    normalized_sql = ' '.join(sql.split())
+    duration_ms = seconds * 1000
+    plan = explain_query(conn, sql, params)
+    
+    SLOW_QUERY_REGISTRY['logger'].info(json.dumps({
+        'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+        'duration_ms': round(duration_ms, 3),
+        'sql': normalized_sql,
+        'params': describe_params(params),
+        'plan': plan
+    }, ensure_ascii=False))
+    
+    with SLOW_QUERY_REGISTRY['lock']:
+        queries = SLOW_QUERY_REGISTRY['queries']
+        entry = queries.get(normalized_sql)
+        if entry is None:
+            if len(queries) >= SLOW_QUERY_TOP:
+                # Descartar a consulta com menor tempo total para dar lugar à nova
+                del queries[min(queries, key=lambda key: queries[key]['total_ms'])]
+            entry = queries[normalized_sql] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'plan': plan}
+        entry['count'] += 1
+        entry['total_ms'] += duration_ms
+        if duration_ms >= entry['max_ms']:
+            entry['max_ms'] = duration_ms
+            entry['plan'] = plan
+
+# Função para executar uma instrução SQL medindo o tempo de execução
+def execute_query(cursor, sql, params=()):
+    start = time.perf_counter()
+    cursor.execute(sql, params)
+    elapsed = time.perf_counter() - start
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        record_slow_query(cursor.connection, sql, params, elapsed)
+    return cursor
+
+# Função para ler o resultado de uma consulta para um DataFrame medindo o tempo de execução
+def read_sql(sql, conn, params=None):
+    start = time.perf_counter()
+    df = pd.read_sql_query(sql, conn, params=params)
+    elapsed = time.perf_counter() - start
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        record_slow_query(conn, sql, params, elapsed)
+    return df
+
+# Função para obter as consultas lentas com maior tempo total
+def get_slow_query_summary():
+    with SLOW_QUERY_REGISTRY['lock']:
+        queries = {sql: dict(entry) for sql, entry in SLOW_QUERY_REGISTRY['queries'].items()}
+    
+    slow_df = pd.DataFrame(
+        [(sql, entry['count'], entry['total_ms'], entry['total_ms'] / entry['count'], entry['max_ms'],
+          ' | '.join(entry['plan'])) for sql, entry in queries.items()],
+        columns=['Consulta', 'Ocorrências', 'Total (ms)', 'Média (ms)', 'Máximo (ms)', 'Plano de execução']
+    )
+    return slow_df.sort_values('Total (ms)', ascending=False).reset_index(drop=True)
+
+# Diretório onde são guardados os perfis de execução (cProfile)
+PROFILE_DIR = os.environ.get('HPO_PROFILE_DIR', 'profiles')
+# Número máximo de ficheiros de perfil mantidos em disco
+PROFILE_KEEP = 50
+
+# Estado do profiler partilhado por todas as sessões do processo
+@st.cache_resource
+def get_profiler_state():
+    return {
+        'lock': threading.Lock(),
+        'remaining': 0
+    }
+
+PROFILER_STATE = get_profiler_state()
+
+# Função para ativar o profiler nas próximas N execuções da aplicação
+def enable_profiler(n_reruns):
+    with PROFILER_STATE['lock']:
+        PROFILER_STATE['remaining'] = n_reruns
+
+# Função para reservar uma execução com profiler (devolve False se já não houver execuções pendentes)
+def claim_profiled_rerun():
+    with PROFILER_STATE['lock']:
+        if PROFILER_STATE['remaining'] <= 0:
+            return False
+        PROFILER_STATE['remaining'] -= 1
+        return True
+
+# Função para executar uma função com cProfile e guardar o perfil em disco
+def profile_rerun(func, label):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        func()
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        filename = f"rerun_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{label}.prof"
+        profiler.dump_stats(os.path.join(PROFILE_DIR, filename))
+        
+        # Manter apenas os perfis mais recentes
+        for old_file in list_profiles()[PROFILE_KEEP:]:
+            os.remove(os.path.join(PROFILE_DIR, old_file))
+
+# Função para listar os perfis guardados (mais recentes primeiro)
+def list_profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted((f for f in os.listdir(PROFILE_DIR) if f.endswith('.prof')), reverse=True)
+
+# Função para obter as funções com maior tempo acumulado num perfil
+def get_profile_top_functions(filename, limit=25):
+    stats = pstats.Stats(os.path.join(PROFILE_DIR, filename))
+    rows = []
+    for (file, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            'Função': f"{func} ({os.path.basename(file)}:{line})",
+            'Chamadas': nc,
+            'Tempo próprio (ms)': tt * 1000,
+            'Tempo acumulado (ms)': ct * 1000
+        })
+    top_df = pd.DataFrame(rows, columns=['Função', 'Chamadas', 'Tempo próprio (ms)', 'Tempo acumulado (ms)'])
+    return top_df.sort_values('Tempo acumulado (ms)', ascending=False).head(limit).reset_index(drop=True)
+
 # Função para hash de senhas
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-# Função para migrar o banco de dados (versão melhorada)
-def migrate_db():
-    conn = sqlite3.connect('hpo_survey.db')
+# Dimensões do protocolo HPO (soma das duas questões, máximo de 14 pontos)
+HPO_DIMENSIONS = {
+    'A. Informação partilhada e comunicação aberta': ['a1', 'a2'],
+    'B. Visão forte: objetivo e valores': ['b1', 'b2'],
+    'C. Aprendizagem contínua': ['c1', 'c2'],
+    'D. Focalização constante nos resultados dos clientes': ['d1', 'd2'],
+    'E. Sistemas e estruturas enérgicos': ['e1', 'e2'],
+    'F. Poder partilhado e envolvimento elevado': ['f1', 'f2'],
+    'G. Liderança': ['g1', 'g2']
+}
+
+# Questões individuais do protocolo HPO, pela ordem do questionário
+HPO_ITEMS = [col for cols in HPO_DIMENSIONS.values() for col in cols]
+
+# Colunas das tabelas de agregação com a soma dos totais de cada dimensão
+HPO_ROLLUP_COLUMNS = {dim: f"sum_{cols[0][0]}" for dim, cols in HPO_DIMENSIONS.items()}
+
+# Respostas corretas do questionário de Liderança (baseadas no documento)
+LIDERANCA_CORRECT_ANSWERS = {
+    'q1': 'b',
+    'q2': 'a',
+    'q3': 'a',
+    'q4': 'b',
+    'q5': 'a',
+    'q6': 'b'
+}
+
+# Opções de resposta das questões de Liderança
+LIDERANCA_OPTIONS = ['a', 'b']
+
+# Granularidades das tabelas de agregação: formato do período em Python e expressão SQL equivalente
+ROLLUP_GRANULARITIES = {
+    'hora': ('%Y-%m-%d %H:00', "substr(timestamp, 1, 13) || ':00'"),
+    'dia': ('%Y-%m-%d', "substr(timestamp, 1, 10)")
+}
+
+# Função para criar as tabelas de agregação temporal (rollups)
+def create_rollup_tables(c):
+    sum_columns = ', '.join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in HPO_ROLLUP_COLUMNS.values())
+    execute_query(c, f'''CREATE TABLE IF NOT EXISTS hpo_rollup
+                 (granularity TEXT NOT NULL,
+                  bucket TEXT NOT NULL,
+                  responses INTEGER NOT NULL DEFAULT 0,
+                  {sum_columns},
+                  PRIMARY KEY (granularity, bucket))''')
+    
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS lideranca_rollup
+                 (granularity TEXT NOT NULL,
+                  bucket TEXT NOT NULL,
+                  question_id TEXT NOT NULL,
+                  answers INTEGER NOT NULL DEFAULT 0,
+                  correct INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (granularity, bucket, question_id))''')
+
+# Função para recalcular as tabelas de agregação a partir das respostas existentes
+def rebuild_rollups(c):
+    execute_query(c, "DELETE FROM hpo_rollup")
+    execute_query(c, "DELETE FROM lideranca_rollup")
+    
+    sum_columns = ', '.join(HPO_ROLLUP_COLUMNS.values())
+    sum_expressions = ', '.join(f"SUM({' + '.join(HPO_DIMENSIONS[dim])})" for dim in HPO_ROLLUP_COLUMNS)
+    correct_case = ' '.join(f"WHEN '{q}' THEN '{answer}'" for q, answer in LIDERANCA_CORRECT_ANSWERS.items())
+    
+    for granularity, (_, bucket_sql) in ROLLUP_GRANULARITIES.items():
+        execute_query(c, f'''INSERT INTO hpo_rollup (granularity, bucket, responses, {sum_columns})
+                     SELECT ?, {bucket_sql}, COUNT(*), {sum_expressions}
+                     FROM responses
+                     GROUP BY {bucket_sql}''', (granularity,))
+        
+        execute_query(c, f'''INSERT INTO lideranca_rollup (granularity, bucket, question_id, answers, correct)
+                     SELECT ?, {bucket_sql}, question_id, COUNT(*),
+                            SUM(response = CASE question_id {correct_case} END)
+                     FROM lideranca_responses
+                     GROUP BY {bucket_sql}, question_id''', (granularity,))
+
+# Função para descontar das agregações as linhas das tabelas indicadas (ex.: duplicados prestes a ser apagados),
+# sem recalcular as agregações a partir das respostas: períodos já arquivados só existem nas agregações
+def subtract_rollups(c, hpo_table, lideranca_table):
+    sum_columns = list(HPO_ROLLUP_COLUMNS.values())
+    sum_expressions = ', '.join(f"SUM({' + '.join(HPO_DIMENSIONS[dim])}) AS {col}" for dim, col in HPO_ROLLUP_COLUMNS.items())
+    updates = ', '.join(f"{col} = hpo_rollup.{col} - d.{col}" for col in sum_columns)
+    correct_case = ' '.join(f"WHEN '{q}' THEN '{answer}'" for q, answer in LIDERANCA_CORRECT_ANSWERS.items())
+    
+    for granularity, (_, bucket_sql) in ROLLUP_GRANULARITIES.items():
+        execute_query(c, f'''UPDATE hpo_rollup SET responses = responses - d.n, {updates}
+                     FROM (SELECT {bucket_sql} AS bucket, COUNT(*) AS n, {sum_expressions}
+                           FROM {hpo_table} GROUP BY {bucket_sql}) AS d
+                     WHERE hpo_rollup.granularity = ? AND hpo_rollup.bucket = d.bucket''', (granularity,))
+        
+        execute_query(c, f'''UPDATE lideranca_rollup SET answers = answers - d.n, correct = lideranca_rollup.correct - d.correct
+                     FROM (SELECT {bucket_sql} AS bucket, question_id, COUNT(*) AS n,
+                                  SUM(response = CASE question_id {correct_case} END) AS correct
+                           FROM {lideranca_table} GROUP BY {bucket_sql}, question_id) AS d
+                     WHERE lideranca_rollup.granularity = ? AND lideranca_rollup.bucket = d.bucket
+                       AND lideranca_rollup.question_id = d.question_id''', (granularity,))
+    
+    execute_query(c, "DELETE FROM hpo_rollup WHERE responses <= 0")
+    execute_query(c, "DELETE FROM lideranca_rollup WHERE answers <= 0")
+
+# Função para atualizar as tabelas de agregação com uma nova resposta HPO
+def update_hpo_rollups(c, timestamp, responses):
+    values = dict(zip(HPO_ITEMS, responses))
+    totals = [sum(values[col] for col in HPO_DIMENSIONS[dim]) for dim in HPO_ROLLUP_COLUMNS]
+    
+    sum_columns = ', '.join(HPO_ROLLUP_COLUMNS.values())
+    placeholders = ', '.join('?' * len(HPO_ROLLUP_COLUMNS))
+    updates = ', '.join(f"{col} = {col} + excluded.{col}" for col in HPO_ROLLUP_COLUMNS.values())
+    
+    for granularity, (bucket_format, _) in ROLLUP_GRANULARITIES.items():
+        execute_query(c, f'''INSERT INTO hpo_rollup (granularity, bucket, responses, {sum_columns})
+                     VALUES (?, ?, 1, {placeholders})
+                     ON CONFLICT (granularity, bucket) DO UPDATE SET
+                     responses = responses + 1, {updates}''',
+                     (granularity, timestamp.strftime(bucket_format)) + tuple(totals))
+
+# Função para atualizar as tabelas de agregação com uma resposta de Liderança
+def update_lideranca_rollups(c, timestamp, question_id, response):
+    correct = 1 if LIDERANCA_CORRECT_ANSWERS.get(question_id) == response else 0
+    
+    for granularity, (bucket_format, _) in ROLLUP_GRANULARITIES.items():
+        execute_query(c, '''INSERT INTO lideranca_rollup (granularity, bucket, question_id, answers, correct)
+                     VALUES (?, ?, ?, 1, ?)
+                     ON CONFLICT (granularity, bucket, question_id) DO UPDATE SET
+                     answers = answers + 1, correct = correct + excluded.correct''',
+                     (granularity, timestamp.strftime(bucket_format), question_id, correct))
+
+# Tabelas de respostas cujas alterações são contadas em data_version
+DATA_VERSION_TABLES = ['responses', 'lideranca_responses']
+
+# Função para criar a tabela de versões dos dados, partilhada por todos os processos que usam a base de dados:
+# version aumenta a cada escrita e generation a cada apagamento das respostas
+def create_data_version_table(c):
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS data_version
+                 (name TEXT PRIMARY KEY, version INTEGER NOT NULL, generation INTEGER NOT NULL)''')
+    
+    # A geração inicial vem do relógio, para que uma base de dados recriada não repita versões antigas
+    for table in DATA_VERSION_TABLES:
+        execute_query(c, "INSERT OR IGNORE INTO data_version (name, version, generation) VALUES (?, 0, ?)",
+                      (table, time.time_ns()))
+
+# Função para registar uma alteração nas tabelas indicadas (na transação de quem escreve). Com reset, a nova geração
+# vem do relógio: um restauro repõe contadores antigos e uma geração + 1 podia repetir a de outra alteração
+def bump_data_version(c, tables, reset=False):
+    placeholders = ', '.join('?' * len(tables))
+    generation_sql = ", generation = ?" if reset else ""
+    execute_query(c, f"UPDATE data_version SET version = version + 1{generation_sql} WHERE name IN ({placeholders})",
+                  ((time.time_ns(),) if reset else ()) + tuple(tables))
+
+# Função para obter a versão atual de uma tabela de respostas (usada como chave das caches)
+@timed
+def get_data_version(table):
+    conn = sqlite3.connect(responses_db_path())
+    c = conn.cursor()
+    execute_query(c, "SELECT version, generation FROM data_version WHERE name = ?", (table,))
+    row = c.fetchone()
+    conn.close()
+    return tuple(row) if row else (0, 0)
+
+# Função para remover submissões duplicadas e criar os índices únicos dos identificadores de submissão
+def create_submission_token_indexes(c):
+    # As linhas antigas sem session_id não são duplicados (o índice único aceita vários NULL) e mantêm-se
+    execute_query(c, '''CREATE TEMP TABLE duplicate_responses AS SELECT * FROM responses
+                 WHERE session_id IS NOT NULL AND id NOT IN
+                 (SELECT MIN(id) FROM responses WHERE session_id IS NOT NULL GROUP BY session_id)''')
+    execute_query(c, '''CREATE TEMP TABLE duplicate_lideranca AS SELECT * FROM lideranca_responses
+                 WHERE session_id IS NOT NULL AND id NOT IN
+                 (SELECT MIN(id) FROM lideranca_responses WHERE session_id IS NOT NULL GROUP BY session_id, question_id)''')
+    
+    # As agregações contavam as linhas duplicadas: são descontadas antes de as apagar
+    subtract_rollups(c, 'temp.duplicate_responses', 'temp.duplicate_lideranca')
+    execute_query(c, "DELETE FROM responses WHERE id IN (SELECT id FROM temp.duplicate_responses)")
+    removed = c.rowcount
+    execute_query(c, "DELETE FROM lideranca_responses WHERE id IN (SELECT id FROM temp.duplicate_lideranca)")
+    removed += c.rowcount
+    execute_query(c, "DROP TABLE temp.duplicate_responses")
+    execute_query(c, "DROP TABLE temp.duplicate_lideranca")
+    
+    execute_query(c, "DROP INDEX IF EXISTS idx_responses_session")
+    execute_query(c, "DROP INDEX IF EXISTS idx_lideranca_session")
+    execute_query(c, "CREATE UNIQUE INDEX idx_responses_token ON responses(session_id)")
+    execute_query(c, "CREATE UNIQUE INDEX idx_lideranca_token ON lideranca_responses(session_id, question_id)")
+    
+    if removed:
+        # Os snapshots têm de ser reconstruídos
+        bump_data_version(c, DATA_VERSION_TABLES, reset=True)
+        print(f"Removidas {removed} respostas duplicadas!")
+
+# Função para criar a tabela de respostas HPO (atualizada com campo de comentários e identificador da submissão)
+def create_responses_table(c):
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS responses
+                 (id INTEGER PRIMARY KEY,
+                  timestamp DATETIME,
+                  a1 INTEGER, a2 INTEGER,
+                  b1 INTEGER, b2 INTEGER,
+                  c1 INTEGER, c2 INTEGER,
+                  d1 INTEGER, d2 INTEGER,
+                  e1 INTEGER, e2 INTEGER,
+                  f1 INTEGER, f2 INTEGER,
+                  g1 INTEGER, g2 INTEGER,
+                  comentario TEXT,
+                  session_id TEXT)''')
+
+# Função para migrar o banco de dados (versão melhorada); db_path permite migrar o ficheiro de uma campanha
+@timed
+def migrate_db(db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH)
     c = conn.cursor()
     
     # Verificar se a coluna comentario já existe na tabela HPO
-    c.execute("PRAGMA table_info(responses)")
+    execute_query(c, "PRAGMA table_info(responses)")
     columns = [column[1] for column in c.fetchall()]
     
     if 'comentario' not in columns:
         # Adicionar a coluna comentario se não existir
-        c.execute("ALTER TABLE responses ADD COLUMN comentario TEXT")
+        execute_query(c, "ALTER TABLE responses ADD COLUMN comentario TEXT")
         print("Banco de dados atualizado com a coluna de comentários para HPO!")
     
+    if 'session_id' not in columns:
+        # Identificador da submissão, usado para não gravar duas vezes a mesma resposta sincronizada
+        execute_query(c, "ALTER TABLE responses ADD COLUMN session_id TEXT")
+        print("Banco de dados atualizado com a coluna session_id para HPO!")
+    
     # Verificar se a tabela de liderança existe
-    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='lideranca_responses'")
+    execute_query(c, "SELECT name FROM sqlite_master WHERE type='table' AND name='lideranca_responses'")
     table_exists = c.fetchone()
     
     if table_exists:
         # Verificar a estrutura atual da tabela
-        c.execute("PRAGMA table_info(lideranca_responses)")
+        execute_query(c, "PRAGMA table_info(lideranca_responses)")
         columns = [column[1] for column in c.fetchall()]
         
         # Se a tabela tem a estrutura antiga (com colunas q1, q2, etc.)
         if 'q1' in columns:
             # Criar uma nova tabela com a estrutura desejada
-            c.execute('''
+            execute_query(c, '''
                 CREATE TABLE lideranca_responses_new (
                     id INTEGER PRIMARY KEY, 
                     session_id TEXT,
@@ -181,7 +685,7 @@ def migrate_db():
             # Como não temos session_id e response_time, vamos usar valores padrão
             # E vamos transformar as colunas q1, q2, etc. em linhas
             for i in range(1, 7):
-                c.execute(f"""
+                execute_query(c, f"""
                     INSERT INTO lideranca_responses_new (session_id, timestamp, question_id, response, response_time)
                     SELECT 
                         'migrated_' || id, 
@@ -194,10 +698,10 @@ def migrate_db():
                 """)
             
             # Remover a tabela antiga
-            c.execute("DROP TABLE lideranca_responses")
+            execute_query(c, "DROP TABLE lideranca_responses")
             
             # Renomear a nova tabela
-            c.execute("ALTER TABLE lideranca_responses_new RENAME TO lideranca_responses")
+            execute_query(c, "ALTER TABLE lideranca_responses_new RENAME TO lideranca_responses")
             
             print("Tabela de liderança migrada para a nova estrutura!")
         
@@ -210,19 +714,19 @@ def migrate_db():
                 # Adicionar colunas faltantes
                 for col in missing_columns:
                     if col == 'session_id':
-                        c.execute("ALTER TABLE lideranca_responses ADD COLUMN session_id TEXT")
+                        execute_query(c, "ALTER TABLE lideranca_responses ADD COLUMN session_id TEXT")
                     elif col == 'question_id':
-                        c.execute("ALTER TABLE lideranca_responses ADD COLUMN question_id TEXT")
+                        execute_query(c, "ALTER TABLE lideranca_responses ADD COLUMN question_id TEXT")
                     elif col == 'response':
-                        c.execute("ALTER TABLE lideranca_responses ADD COLUMN response TEXT")
+                        execute_query(c, "ALTER TABLE lideranca_responses ADD COLUMN response TEXT")
                     elif col == 'response_time':
-                        c.execute("ALTER TABLE lideranca_responses ADD COLUMN response_time REAL")
+                        execute_query(c, "ALTER TABLE lideranca_responses ADD COLUMN response_time REAL")
                 
                 print("Tabela de liderança atualizada com colunas faltantes!")
     
     else:
         # Criar tabela para respostas de liderança com a nova estrutura
-        c.execute('''
+        execute_query(c, '''
             CREATE TABLE lideranca_responses (
                 id INTEGER PRIMARY KEY, 
                 session_id TEXT,
@@ -234,39 +738,66 @@ def migrate_db():
         ''')
         print("Tabela de liderança criada com nova estrutura!")
     
+    # Contadores de alterações para invalidar as caches em todas as réplicas
+    create_data_version_table(c)
+    
+    # Índices para os filtros por período
+    execute_query(c, "CREATE INDEX IF NOT EXISTS idx_responses_timestamp ON responses(timestamp)")
+    execute_query(c, "CREATE INDEX IF NOT EXISTS idx_lideranca_timestamp ON lideranca_responses(timestamp)")
+    
+    # Verificar se as tabelas de agregação temporal existem
+    execute_query(c, "SELECT name FROM sqlite_master WHERE type='table' AND name='hpo_rollup'")
+    rollups_exist = c.fetchone()
+    
+    if not rollups_exist:
+        # Criar as tabelas de agregação e preenchê-las com as respostas já existentes
+        create_rollup_tables(c)
+        rebuild_rollups(c)
+        print("Tabelas de agregação temporal criadas!")
+    
+    # Índices únicos dos identificadores de submissão: uma submissão repetida (duplo clique, rerun
+    # após reconexão, sincronização reenviada) é ignorada pelo INSERT OR IGNORE
+    execute_query(c, "SELECT name FROM sqlite_master WHERE type='index' AND name='idx_responses_token'")
+    tokens_exist = c.fetchone()
+    
+    if not tokens_exist:
+        create_submission_token_indexes(c)
+    
     conn.commit()
     conn.close()
 
 # Inicialização do banco de dados
+@timed
 def init_db():
-    conn = sqlite3.connect('hpo_survey.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
+    # Novas bases de dados usam auto_vacuum incremental (numa base de dados existente só tem efeito após um VACUUM)
+    execute_query(c, "PRAGMA auto_vacuum = INCREMENTAL")
+    # O modo do diário fica gravado no ficheiro: as restantes ligações passam a usá-lo
+    execute_query(c, f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    
     # Tabela de usuários
-    c.execute('''CREATE TABLE IF NOT EXISTS users
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS users
                  (id INTEGER PRIMARY KEY, username TEXT UNIQUE, password TEXT, role TEXT)''')
     
-    # Tabela de respostas HPO (atualizada com campo de comentários)
-    c.execute('''CREATE TABLE IF NOT EXISTS responses
-                 (id INTEGER PRIMARY KEY, 
-                  timestamp DATETIME,
-                  a1 INTEGER, a2 INTEGER,
-                  b1 INTEGER, b2 INTEGER,
-                  c1 INTEGER, c2 INTEGER,
-                  d1 INTEGER, d2 INTEGER,
-                  e1 INTEGER, e2 INTEGER,
-                  f1 INTEGER, f2 INTEGER,
-                  g1 INTEGER, g2 INTEGER,
-                  comentario TEXT)''')
+    # Tabela de respostas HPO (as respostas da campanha inicial ficam na base de dados principal)
+    create_responses_table(c)
     
     # Tabela de respostas de Liderança
-    c.execute('''CREATE TABLE IF NOT EXISTS lideranca_responses
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS lideranca_responses
                  (id INTEGER PRIMARY KEY, 
                   timestamp DATETIME,
                   q1 TEXT, q2 TEXT, q3 TEXT, 
                   q4 TEXT, q5 TEXT, q6 TEXT,
                   comentario TEXT)''')
     
+    # Registo das campanhas
+    create_campaigns_table(c)
+    
+    # Liderança e histórico do agendador de tarefas de manutenção
+    create_scheduler_tables(c)
+    
     # Inserir usuários padrão se não existirem (com senhas hasheadas)
     default_users = [
         ('admin', hash_password('admin123'), 'administrador'),
@@ -275,7 +806,7 @@ def init_db():
     
     for username, password, role in default_users:
         try:
-            c.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
+            execute_query(c, "INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
                      (username, password, role))
         except sqlite3.IntegrityError:
             pass  # Usuário já existe
@@ -285,24 +816,208 @@ def init_db():
     
     # Migrar banco de dados existente
     migrate_db()
+    
+    # Criar ou migrar os ficheiros das restantes campanhas
+    init_campaign_dbs(DB_PATH)
+
+# Função para migrar os ficheiros de todas as campanhas, uma única vez por processo e base de dados principal
+# (init_db corre em cada rerun; as campanhas criadas depois já são criadas com o esquema atual)
+@st.cache_resource
+def init_campaign_dbs(db_path):
+    for campaign in get_campaigns():
+        if campaign[2]:
+            init_campaign_db(campaign_db_path(campaign[2]))
+    return True
+
+# Diretório dos ficheiros das campanhas (relativo ao diretório da base de dados principal)
+CAMPAIGN_DIR = os.environ.get('HPO_CAMPAIGN_DIR', 'campaigns')
+
+# Campanha escolhida nos painéis para o rerun em curso. É guardada por thread (cada rerun do Streamlit,
+# tal como cada pedido do serviço de ingestão, corre na sua própria thread); sem escolha usa-se a campanha ativa
+CAMPAIGN_CONTEXT = threading.local()
+
+# Função para criar o registo das campanhas, com a campanha inicial (as respostas já existentes na base de dados principal)
+def create_campaigns_table(c):
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS campaigns
+                 (id INTEGER PRIMARY KEY,
+                  name TEXT UNIQUE NOT NULL,
+                  db_file TEXT,
+                  created_at DATETIME,
+                  active INTEGER NOT NULL DEFAULT 0)''')
+    execute_query(c, '''INSERT INTO campaigns (name, db_file, created_at, active)
+                 SELECT 'Campanha inicial', NULL, ?, 1 WHERE NOT EXISTS (SELECT 1 FROM campaigns)''', (datetime.now(),))
+
+# Função para obter o caminho da base de dados de uma campanha (db_file vazio: base de dados principal)
+def campaign_db_path(db_file):
+    if not db_file:
+        return DB_PATH
+    return os.path.join(os.path.dirname(DB_PATH), CAMPAIGN_DIR, db_file)
+
+# Função para criar (se necessário) e migrar o ficheiro de uma campanha
+@timed
+def init_campaign_db(db_path):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    execute_query(c, "PRAGMA auto_vacuum = INCREMENTAL")
+    execute_query(c, f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    create_responses_table(c)
+    conn.commit()
+    conn.close()
+    
+    migrate_db(db_path)
+
+# Função para listar as campanhas (id, nome, ficheiro, data de criação, ativa)
+@timed
+def get_campaigns():
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    execute_query(c, "SELECT id, name, db_file, created_at, active FROM campaigns ORDER BY id")
+    campaigns = c.fetchall()
+    conn.close()
+    return campaigns
+
+# Função para obter a campanha ativa, onde são gravadas as novas respostas
+@timed
+def active_campaign():
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    execute_query(c, "SELECT id, name, db_file, created_at, active FROM campaigns WHERE active = 1")
+    campaign = c.fetchone()
+    conn.close()
+    return campaign
+
+# Função para escolher a campanha usada pelas funções de respostas nesta thread (None: campanha ativa)
+def select_campaign(db_path):
+    CAMPAIGN_CONTEXT.db_path = db_path
+
+# Função para obter a base de dados das respostas: a campanha escolhida ou, por omissão, a ativa
+def responses_db_path():
+    db_path = getattr(CAMPAIGN_CONTEXT, 'db_path', None)
+    if db_path:
+        return db_path
+    
+    campaign = active_campaign()
+    return campaign_db_path(campaign[2]) if campaign else DB_PATH
+
+# Função para gerar o nome do ficheiro de uma campanha a partir do nome
+def campaign_slug(name):
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', ascii_name.lower()).strip('-') or 'campanha'
+
+# Função para tornar uma campanha ativa (as novas respostas passam a ser gravadas no seu ficheiro)
+@timed
+def activate_campaign(campaign_id):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    execute_query(c, "UPDATE campaigns SET active = (id = ?)", (campaign_id,))
+    conn.commit()
+    conn.close()
+
+# Função para criar uma campanha com o seu próprio ficheiro de respostas; devolve o id (None se o nome já existir)
+@timed
+def create_campaign(name, activate=True):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    try:
+        execute_query(c, "INSERT INTO campaigns (name, created_at) VALUES (?, ?)", (name, datetime.now()))
+    except sqlite3.IntegrityError:
+        conn.close()
+        return None
+    
+    campaign_id = c.lastrowid
+    db_file = f"{campaign_id:03d}-{campaign_slug(name)}.db"
+    execute_query(c, "UPDATE campaigns SET db_file = ? WHERE id = ?", (db_file, campaign_id))
+    conn.commit()
+    conn.close()
+    
+    db_path = campaign_db_path(db_file)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    init_campaign_db(db_path)
+    
+    if activate:
+        activate_campaign(campaign_id)
+    return campaign_id
+
+# Função para recomeçar uma campanha sem respostas, em tempo constante: a campanha passa a gravar num ficheiro
+# novo e as respostas atuais ficam, sem serem copiadas, numa campanha fechada "<nome> (até <data>)".
+# A troca é uma única transação no registo, pelo que cada gravação fica inteira no ficheiro antigo ou no novo
+@timed
+def reset_campaign(campaign_id):
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    execute_query(c, "SELECT name, db_file, created_at FROM campaigns WHERE id = ?", (campaign_id,))
+    name, db_file, created_at = c.fetchone()
+    
+    now = datetime.now()
+    new_db_file = f"{campaign_id:03d}-{campaign_slug(name)}-{now.strftime('%Y%m%d_%H%M%S_%f')}.db"
+    db_path = campaign_db_path(new_db_file)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    init_campaign_db(db_path)
+    
+    execute_query(c, "INSERT INTO campaigns (name, db_file, created_at, active) VALUES (?, ?, ?, 0)",
+                  (f"{name} (até {now.strftime('%Y-%m-%d %H:%M:%S.%f')})", db_file, created_at))
+    execute_query(c, "UPDATE campaigns SET db_file = ?, created_at = ? WHERE id = ?", (new_db_file, now, campaign_id))
+    conn.commit()
+    conn.close()
+    
+    clear_response_caches()
+    return new_db_file
+
+# Função para resumir todas as campanhas; os ficheiros são anexados (ATTACH) um de cada vez à ligação principal
+@timed
+def campaign_overview():
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    rows = []
+    for campaign_id, name, db_file, created_at, active in get_campaigns():
+        db_path = campaign_db_path(db_file)
+        schema = 'main'
+        if db_file:
+            execute_query(c, "ATTACH DATABASE ? AS campaign", (db_path,))
+            schema = 'campaign'
+        
+        execute_query(c, f'''SELECT (SELECT COUNT(*) FROM {schema}.responses),
+                                    (SELECT COUNT(DISTINCT session_id) FROM {schema}.lideranca_responses),
+                                    (SELECT MAX(timestamp) FROM {schema}.responses)''')
+        hpo_count, lideranca_sessions, last_response = c.fetchone()
+        
+        if db_file:
+            execute_query(c, "DETACH DATABASE campaign")
+        
+        rows.append({
+            'Campanha': name,
+            'Ativa': "Sim" if active else "",
+            'Criada em': str(created_at)[:16],
+            'Respostas HPO': hpo_count,
+            'Sessões Liderança': lideranca_sessions,
+            'Última resposta HPO': str(last_response)[:16] if last_response else "",
+            'Ficheiro': db_file or os.path.basename(DB_PATH),
+            'Tamanho (MB)': round(os.path.getsize(db_path) / 1024 ** 2, 2) if os.path.exists(db_path) else 0.0
+        })
+    
+    conn.close()
+    return pd.DataFrame(rows)
 
 # Função para verificar login
+@timed
 def check_login(username, password):
-    conn = sqlite3.connect('hpo_survey.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     hashed_password = hash_password(password)
-    c.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, hashed_password))
+    execute_query(c, "SELECT * FROM users WHERE username = ? AND password = ?", (username, hashed_password))
     user = c.fetchone()
     conn.close()
     return user
 
 # Função para adicionar novo usuário (apenas admin)
+@timed
 def add_user(username, password, role):
-    conn = sqlite3.connect('hpo_survey.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     hashed_password = hash_password(password)
     try:
-        c.execute("INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
+        execute_query(c, "INSERT INTO users (username, password, role) VALUES (?, ?, ?)", 
                  (username, hashed_password, role))
         conn.commit()
         success = True
@@ -312,31 +1027,34 @@ def add_user(username, password, role):
     return success
 
 # Função para listar usuários (apenas admin)
+@timed
 def list_users():
-    conn = sqlite3.connect('hpo_survey.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("SELECT id, username, role FROM users")
+    execute_query(c, "SELECT id, username, role FROM users")
     users = c.fetchall()
     conn.close()
     return users
 
 # Função para excluir usuário (apenas admin)
+@timed
 def delete_user(user_id):
-    conn = sqlite3.connect('hpo_survey.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    execute_query(c, "DELETE FROM users WHERE id = ?", (user_id,))
     conn.commit()
     conn.close()
 
 # Função para editar usuário (apenas admin)
+@timed
 def edit_user(user_id, new_username=None, new_password=None, new_role=None):
-    conn = sqlite3.connect('hpo_survey.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     success = False
     
     try:
         # Verificar se o usuário existe
-        c.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+        execute_query(c, "SELECT * FROM users WHERE id = ?", (user_id,))
         user = c.fetchone()
         
         if user:
@@ -362,7 +1080,7 @@ def edit_user(user_id, new_username=None, new_password=None, new_role=None):
                 
                 # Executar a atualização
                 query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
-                c.execute(query, params)
+                execute_query(c, query, params)
                 conn.commit()
                 success = True
         
@@ -376,155 +1094,1284 @@ def edit_user(user_id, new_username=None, new_password=None, new_role=None):
     return success
 
 # Função para buscar informações de um usuário específico
+@timed
 def get_user(user_id):
-    conn = sqlite3.connect('hpo_survey.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
-    c.execute("SELECT id, username, role FROM users WHERE id = ?", (user_id,))
+    execute_query(c, "SELECT id, username, role FROM users WHERE id = ?", (user_id,))
     user = c.fetchone()
     conn.close()
     return user   
 
-# Função para resetar completamente o sistema (apenas admin)
-def reset_entire_system():
+# Função para resetar completamente uma campanha (apenas admin)
+def reset_entire_system(campaign_id):
     try:
-        # Apagar todas as respostas
-        delete_all_responses()
+        # Recomeçar a campanha num ficheiro novo (as respostas atuais ficam numa campanha fechada)
+        reset_campaign(campaign_id)
         
         # Limpar cache do Streamlit para forçar recálculo de todas as estatísticas
         st.cache_data.clear()
         
-        # Recriar o banco de dados para garantir limpeza completa
-        init_db()
-        
         return True
     except Exception as e:
         st.error(f"Erro durante o reset: {str(e)}")
         return False
 
-# Função para apagar todas as respostas (apenas admin)
-def delete_all_responses():
-    conn = sqlite3.connect('hpo_survey.db')
+# Diretório dos arquivos de respostas antigas (relativo ao diretório da base de dados principal)
+ARCHIVE_DIR = os.environ.get('HPO_ARCHIVE_DIR', 'archive')
+# Período de retenção por omissão (dias): respostas mais antigas podem ser arquivadas
+ARCHIVE_RETENTION_DAYS = int(os.environ.get('HPO_ARCHIVE_RETENTION_DAYS', '365'))
+
+AUTO_VACUUM_MODES = {0: "nenhum", 1: "completo", 2: "incremental"}
+
+# Função para obter o tamanho e a fragmentação (percentagem de páginas livres) de um ficheiro SQLite
+@timed
+def database_file_stats(db_path):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    stats = {}
+    for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum'):
+        execute_query(c, f"PRAGMA {pragma}")
+        stats[pragma] = c.fetchone()[0]
+    conn.close()
+    
+    stats['size_mb'] = os.path.getsize(db_path) / 1024 ** 2
+    stats['fragmentation'] = stats['freelist_count'] / stats['page_count'] * 100 if stats['page_count'] else 0.0
+    stats['auto_vacuum'] = AUTO_VACUUM_MODES.get(stats['auto_vacuum'], stats['auto_vacuum'])
+    return stats
+
+# Período (dias) usado para calcular o ritmo de crescimento a partir das agregações diárias
+HEALTH_GROWTH_DAYS = 7
+
+# Função para obter o estado de uma base de dados de respostas apenas com agregados SQL e PRAGMAs, sem carregar
+# as respostas: contagens, primeira e última resposta, tamanhos, índices e ritmo de crescimento
+@timed
+def database_health(db_path):
+    health = database_file_stats(db_path)
+    wal_path = f"{db_path}-wal"
+    health['wal_mb'] = os.path.getsize(wal_path) / 1024 ** 2 if os.path.exists(wal_path) else 0.0
+    
+    conn = sqlite3.connect(db_path)
     c = conn.cursor()
-    c.execute("DELETE FROM responses")
-    c.execute("DELETE FROM lideranca_responses")
+    
+    health['tables'] = {}
+    for table in DATA_VERSION_TABLES:
+        # MIN e MAX em consultas separadas, para que cada uma leia apenas uma ponta do índice do timestamp
+        execute_query(c, f"SELECT COUNT(*) FROM {table}")
+        rows = c.fetchone()[0]
+        execute_query(c, f"SELECT MIN(timestamp) FROM {table}")
+        first = c.fetchone()[0]
+        execute_query(c, f"SELECT MAX(timestamp) FROM {table}")
+        last = c.fetchone()[0]
+        execute_query(c, f"PRAGMA index_list({table})")
+        indexes = [(row[1], bool(row[2])) for row in c.fetchall()]
+        health['tables'][table] = {'rows': rows, 'first': first, 'last': last, 'indexes': indexes}
+    
+    # Respostas gravadas nos últimos dias, a partir das agregações diárias (no máximo uma linha por dia e questão)
+    since = (datetime.now() - timedelta(days=HEALTH_GROWTH_DAYS)).strftime('%Y-%m-%d')
+    execute_query(c, "SELECT COALESCE(SUM(responses), 0) FROM hpo_rollup WHERE granularity = 'dia' AND bucket >= ?", (since,))
+    recent_rows = c.fetchone()[0]
+    execute_query(c, "SELECT COALESCE(SUM(answers), 0) FROM lideranca_rollup WHERE granularity = 'dia' AND bucket >= ?",
+                  (since,))
+    recent_rows += c.fetchone()[0]
+    conn.close()
+    
+    # Crescimento estimado em MB/dia com o tamanho médio atual de cada linha (incluindo índices)
+    total_rows = sum(table['rows'] for table in health['tables'].values())
+    bytes_per_row = health['page_count'] * health['page_size'] / total_rows if total_rows else 0
+    health['rows_per_day'] = recent_rows / HEALTH_GROWTH_DAYS
+    health['growth_mb_per_day'] = health['rows_per_day'] * bytes_per_row / 1024 ** 2
+    return health
+
+# Função para medir o espaço ocupado por cada tabela e índice (tabela virtual dbstat, que percorre todas as
+# páginas; por isso só é usada a pedido). Devolve None se o SQLite não tiver sido compilado com o dbstat
+@timed
+def database_object_sizes(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        sizes_df = read_sql('''SELECT name AS "Tabela/índice", COUNT(*) AS "Páginas",
+                                      ROUND(SUM(pgsize) / 1048576.0, 2) AS "Tamanho (MB)",
+                                      ROUND(100.0 * SUM(unused) / SUM(pgsize), 1) AS "Espaço livre nas páginas (%)"
+                               FROM dbstat GROUP BY name ORDER BY SUM(pgsize) DESC''', conn)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        sizes_df = None
+    conn.close()
+    return sizes_df
+
+# Função para compactar uma base de dados: na primeira vez ativa o auto_vacuum incremental (exige um VACUUM
+# completo); a partir daí basta devolver as páginas livres com incremental_vacuum
+@timed
+def compact_database(db_path):
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    execute_query(c, "PRAGMA auto_vacuum")
+    
+    if c.fetchone()[0] != 2:
+        execute_query(c, "PRAGMA auto_vacuum = INCREMENTAL")
+        execute_query(c, "VACUUM")
+    else:
+        execute_query(c, "PRAGMA incremental_vacuum").fetchall()
+    
+    conn.close()
+
+# Função para mover as respostas anteriores ao período de retenção para um arquivo comprimido (.db.gz)
+# e compactar a base de dados da campanha. As agregações temporais não são alteradas, pelo que a
+# evolução continua a incluir os períodos arquivados
+@timed
+def archive_responses(retention_days):
+    db_path = responses_db_path()
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+    before = database_file_stats(db_path)
+    
+    archive_dir = os.path.join(os.path.dirname(DB_PATH), ARCHIVE_DIR)
+    os.makedirs(archive_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    archive_path = os.path.join(archive_dir, f"{stem}-ate-{cutoff}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
+    
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    execute_query(c, "ATTACH DATABASE ? AS archive", (archive_path,))
+    
+    # Cópia para o arquivo, gravada antes da remoção: com a base de dados em WAL uma transação sobre as duas
+    # bases de dados não é atómica no seu conjunto, pelo que uma falha a meio deixa linhas repetidas, nunca perdidas
+    execute_query(c, "BEGIN")
+    execute_query(c, "CREATE TABLE archive.responses AS SELECT * FROM main.responses WHERE timestamp < ?", (cutoff,))
+    # As sessões de Liderança são arquivadas completas, a partir da primeira resposta
+    execute_query(c, '''CREATE TABLE archive.lideranca_responses AS SELECT * FROM main.lideranca_responses
+                 WHERE session_id IN (SELECT session_id FROM main.lideranca_responses WHERE timestamp < ?)''', (cutoff,))
     conn.commit()
+    
+    # Remoção apenas das linhas copiadas (pelo id): respostas gravadas entretanto ficam na base de dados
+    execute_query(c, "BEGIN")
+    execute_query(c, "DELETE FROM main.responses WHERE id IN (SELECT id FROM archive.responses)")
+    archived_hpo = c.rowcount
+    execute_query(c, "SELECT COUNT(DISTINCT session_id) FROM archive.lideranca_responses")
+    archived_sessions = c.fetchone()[0]
+    execute_query(c, "DELETE FROM main.lideranca_responses WHERE id IN (SELECT id FROM archive.lideranca_responses)")
+    
+    changed = [table for table, count in (('responses', archived_hpo), ('lideranca_responses', archived_sessions)) if count]
+    if changed:
+        # Linhas apagadas: os snapshots destas tabelas têm de ser reconstruídos
+        bump_data_version(c, changed, reset=True)
+        conn.commit()
+    else:
+        conn.rollback()
+    
+    execute_query(c, "DETACH DATABASE archive")
     conn.close()
+    
+    if changed:
+        clear_response_caches()
+        with open(archive_path, 'rb') as source, gzip.open(f"{archive_path}.gz", 'wb') as target:
+            shutil.copyfileobj(source, target)
+    os.remove(archive_path)
+    
+    compact_database(db_path)
+    
+    return {
+        'cutoff': cutoff,
+        'hpo': archived_hpo,
+        'lideranca': archived_sessions,
+        'archive': f"{archive_path}.gz" if changed else None,
+        'before': before,
+        'after': database_file_stats(db_path)
+    }
 
-# Função para salvar resposta do questionário HPO
-def save_hpo_response(responses, comentario=""):
-    conn = sqlite3.connect('hpo_survey.db')
+# Diretório das cópias de segurança (relativo ao diretório da base de dados principal)
+BACKUP_DIR = os.environ.get('HPO_BACKUP_DIR', 'backups')
+# Número de cópias mantidas (as mais antigas são apagadas)
+BACKUP_KEEP = int(os.environ.get('HPO_BACKUP_KEEP', '7'))
+# Intervalo entre cópias agendadas, em horas (0 desativa as cópias agendadas)
+BACKUP_INTERVAL_HOURS = float(os.environ.get('HPO_BACKUP_INTERVAL_HOURS', '24'))
+# Páginas copiadas por passo (4 MB com páginas de 4 KB) e pausa entre passos, só com o diário de rollback: entre passos
+# a base de dados fica livre, pelo que as submissões continuam a ser gravadas durante a cópia. Mesmo assim, o último passo
+# bloqueia as gravações durante segundos numa base de dados de 1 GB; em WAL a cópia é feita num só passo, sem bloqueios
+BACKUP_STEP_PAGES = 1024
+BACKUP_STEP_PAUSE = 0.005
+# Uma escrita feita por outra ligação obriga a cópia a recomeçar: cada reinício multiplica as páginas por passo
+# (cópia mais curta, com menos intervalos entre passos) e, após BACKUP_MAX_RESTARTS, a cópia é feita num só passo
+BACKUP_STEP_GROWTH = 8
+BACKUP_MAX_RESTARTS = 3
+
+# Função para copiar uma base de dados em funcionamento com a API de backup do SQLite, em passos de `pages` páginas;
+# devolve o número de reinícios
+@timed
+def copy_database(source_path, target_path, pages=BACKUP_STEP_PAGES):
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    progress = {'remaining': None, 'restarts': 0}
+    
+    # Em WAL a cópia num só passo lê um instantâneo consistente: as gravações continuam (vão para o WAL)
+    # e não obrigam a cópia a recomeçar
+    c = source.cursor()
+    execute_query(c, "PRAGMA journal_mode")
+    if c.fetchone()[0] == 'wal':
+        pages = -1
+    
+    def pause_between_steps(status, remaining, total):
+        # Mais páginas por copiar do que no passo anterior: a cópia recomeçou
+        if progress['remaining'] is not None and remaining > progress['remaining']:
+            raise InterruptedError("Cópia reiniciada por uma escrita")
+        progress['remaining'] = remaining
+        time.sleep(BACKUP_STEP_PAUSE)
+    
+    try:
+        while True:
+            if pages > 0 and progress['restarts'] < BACKUP_MAX_RESTARTS:
+                step_pages = pages * BACKUP_STEP_GROWTH ** progress['restarts']
+            else:
+                # Num só passo as escritas esperam até ao fim da cópia
+                step_pages = -1
+            
+            progress['remaining'] = None
+            try:
+                source.backup(target, pages=step_pages, progress=pause_between_steps, sleep=BACKUP_STEP_PAUSE)
+                break
+            except InterruptedError:
+                progress['restarts'] += 1
+    finally:
+        source.close()
+        target.close()
+    
+    return progress['restarts']
+
+# Função para verificar a integridade de um ficheiro SQLite
+@timed
+def check_database_integrity(db_path):
+    conn = sqlite3.connect(db_path)
     c = conn.cursor()
+    execute_query(c, "PRAGMA integrity_check")
+    result = [row[0] for row in c.fetchall()]
+    conn.close()
+    return "ok" if result == ["ok"] else "; ".join(result[:5])
+
+def backup_root():
+    return os.path.join(os.path.dirname(DB_PATH), BACKUP_DIR)
+
+# Função para listar as cópias de segurança concluídas, da mais recente para a mais antiga
+@timed
+def list_backups():
+    root = backup_root()
+    if not os.path.isdir(root):
+        return []
+    
+    backups = []
+    for name in sorted(os.listdir(root), reverse=True):
+        try:
+            with open(os.path.join(root, name, 'MANIFEST.json'), encoding='utf-8') as f:
+                backups.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # Cópia em curso (.tmp) ou incompleta
+    return backups
+
+# Função para criar uma cópia de segurança da base de dados principal e dos ficheiros de todas as campanhas.
+# A cópia é feita num diretório temporário, verificada e só depois tornada visível; as mais antigas são rodadas
+@timed
+def run_backup(reason="manual", rotate=True):
+    name = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    backup_dir = os.path.join(backup_root(), name)
+    tmp_dir = f"{backup_dir}.tmp"
+    os.makedirs(os.path.join(tmp_dir, 'campaigns'))
+    
+    try:
+        files = []
+        for db_file in [None] + [campaign[2] for campaign in get_campaigns() if campaign[2]]:
+            path = os.path.join('campaigns', db_file) if db_file else os.path.basename(DB_PATH)
+            start = time.perf_counter()
+            restarts = copy_database(campaign_db_path(db_file), os.path.join(tmp_dir, path))
+            files.append({
+                'db_file': db_file,
+                'path': path,
+                'size_mb': round(os.path.getsize(os.path.join(tmp_dir, path)) / 1024 ** 2, 2),
+                'seconds': round(time.perf_counter() - start, 3),
+                'restarts': restarts,
+                'integrity': check_database_integrity(os.path.join(tmp_dir, path))
+            })
+        
+        manifest = {
+            'name': name,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'reason': reason,
+            'ok': all(entry['integrity'] == "ok" for entry in files),
+            'files': files
+        }
+        with open(os.path.join(tmp_dir, 'MANIFEST.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_dir, backup_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    
+    # Rotação: manter apenas as cópias mais recentes
+    if rotate:
+        for old in list_backups()[BACKUP_KEEP:]:
+            shutil.rmtree(os.path.join(backup_root(), old['name']), ignore_errors=True)
     
-    c.execute('''INSERT INTO responses 
-                 (timestamp, a1, a2, b1, b2, c1, c2, d1, d2, e1, e2, f1, f2, g1, g2, comentario)
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                 (datetime.now(),) + tuple(responses) + (comentario,))
+    return manifest
+
+# Função para restaurar uma cópia de segurança (depois de guardar uma cópia do estado atual).
+# Os ficheiros são repostos com a API de backup, pelo que as ligações abertas noutras sessões continuam válidas
+@timed
+def restore_backup(name):
+    backup_dir = os.path.join(backup_root(), name)
+    with open(os.path.join(backup_dir, 'MANIFEST.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not manifest['ok']:
+        raise ValueError(f"A cópia {name} não passou a verificação de integridade")
+    
+    with get_backup_state()['lock']:
+        # Sem rotação, para não apagar a própria cópia a restaurar
+        run_backup(reason=f"antes do restauro de {name}", rotate=False)
+        
+        for entry in manifest['files']:
+            target_path = campaign_db_path(entry['db_file'])
+            os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+            copy_database(os.path.join(backup_dir, entry['path']), target_path, pages=-1)
+            
+            # Nova geração dos dados: as caches e os snapshots de todas as réplicas são reconstruídos
+            conn = sqlite3.connect(target_path)
+            c = conn.cursor()
+            bump_data_version(c, DATA_VERSION_TABLES, reset=True)
+            conn.commit()
+            conn.close()
+            
+            # Os snapshots deste ficheiro descrevem os dados substituídos: são apagados
+            for table in DATA_VERSION_TABLES:
+                with snapshot_lock(table, target_path):
+                    clear_snapshots(table, target_path)
     
+    clear_response_caches()
+    return manifest
+
+# Estado das cópias de segurança em segundo plano, partilhado por todas as sessões do processo
+@st.cache_resource
+def get_backup_state():
+    return {'lock': threading.Lock(), 'last': None, 'error': None}
+
+# Função executada pela thread de cópia de segurança
+def backup_worker(state, reason):
+    try:
+        state['last'] = run_backup(reason)
+        state['error'] = None
+    except Exception as e:
+        state['error'] = str(e)
+    finally:
+        state['lock'].release()
+
+# Função para iniciar uma cópia de segurança numa thread (devolve False se já houver uma em curso)
+def start_backup(state, reason="manual"):
+    if not state['lock'].acquire(blocking=False):
+        return False
+    threading.Thread(target=backup_worker, args=(state, reason), name="hpo-backup", daemon=True).start()
+    return True
+
+# Agendador das tarefas de manutenção (0 desativa)
+SCHEDULER_ENABLED = os.environ.get('HPO_SCHEDULER', '1') == '1'
+# Intervalo entre verificações do agendador, em segundos
+SCHEDULER_TICK_SECONDS = 30
+# Duração da liderança de um processo: só o processo líder executa as tarefas agendadas e renova a liderança
+# a cada verificação e antes de cada tarefa; se deixar de a renovar, outro processo assume ao fim deste tempo
+SCHEDULER_LEASE_SECONDS = 600
+# Variação aleatória de cada intervalo (±10%), para que as tarefas não coincidam sempre no mesmo instante
+SCHEDULER_JITTER = 0.1
+# Execuções guardadas no histórico (as mais antigas são apagadas)
+SCHEDULER_HISTORY = 500
+
+# Tarefas registadas com register_job, pela ordem de registo
+SCHEDULED_JOBS = {}
+
+# Função para criar a tabela da liderança do agendador e o histórico das execuções (na base de dados principal,
+# partilhada por todos os processos)
+def create_scheduler_tables(c):
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS scheduler_lease
+                 (name TEXT PRIMARY KEY,
+                  owner TEXT NOT NULL,
+                  expires_at REAL NOT NULL)''')
+    execute_query(c, '''CREATE TABLE IF NOT EXISTS scheduler_runs
+                 (id INTEGER PRIMARY KEY,
+                  job TEXT NOT NULL,
+                  started_at DATETIME NOT NULL,
+                  seconds REAL,
+                  status TEXT NOT NULL,
+                  detail TEXT,
+                  owner TEXT)''')
+    execute_query(c, "CREATE INDEX IF NOT EXISTS idx_scheduler_runs_job ON scheduler_runs (job, id)")
+
+# Função para obter o intervalo de uma tarefa em segundos (variável HPO_JOB_<NOME>_MINUTES; 0 desativa a tarefa)
+def job_interval(name, default_minutes):
+    return float(os.environ.get(f"HPO_JOB_{name.upper()}_MINUTES", default_minutes)) * 60
+
+# Função para registar uma tarefa periódica. last_run (opcional) devolve a última execução feita fora do agendador
+# (ex.: uma cópia manual), para que não seja repetida antes do fim do intervalo
+def register_job(name, func, interval_seconds, description, last_run=None):
+    if interval_seconds > 0:
+        SCHEDULED_JOBS[name] = {'func': func, 'interval': interval_seconds, 'description': description,
+                                'last_run': last_run}
+
+# Estado do agendador neste processo, partilhado por todas as sessões
+@st.cache_resource
+def get_scheduler_state():
+    return {
+        'owner': f"{os.getpid()}-{uuid.uuid4().hex[:8]}",
+        'leader': False,
+        'next_run': {},
+        'locks': {name: threading.Lock() for name in SCHEDULED_JOBS}
+    }
+
+# Função para obter ou renovar a liderança do agendador; devolve True se este processo for o líder
+@timed
+def acquire_scheduler_lease(owner):
+    now = time.time()
+    conn = sqlite3.connect(DB_PATH, timeout=5)
+    c = conn.cursor()
+    execute_query(c, '''INSERT INTO scheduler_lease (name, owner, expires_at) VALUES ('manutencao', ?, ?)
+                 ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                 WHERE scheduler_lease.owner = excluded.owner OR scheduler_lease.expires_at < ?''',
+                 (owner, now + SCHEDULER_LEASE_SECONDS, now))
+    leader = c.rowcount == 1
     conn.commit()
     conn.close()
+    return leader
 
-# Função para salvar resposta do questionário de Liderança
-def save_lideranca_response(session_id, question_data):
-    conn = sqlite3.connect('hpo_survey.db')
+# Função para obter o processo líder do agendador (None se nenhum processo tiver a liderança válida)
+@timed
+def scheduler_leader():
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    execute_query(c, "SELECT owner FROM scheduler_lease WHERE name = 'manutencao' AND expires_at >= ?", (time.time(),))
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+# Função para gravar uma execução no histórico, apagando as mais antigas
+@timed
+def record_job_run(job, started_at, seconds, status, detail, owner):
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    execute_query(c, '''INSERT INTO scheduler_runs (job, started_at, seconds, status, detail, owner)
+                 VALUES (?, ?, ?, ?, ?, ?)''', (job, started_at, seconds, status, detail, owner))
+    execute_query(c, "DELETE FROM scheduler_runs WHERE id <= ?", (c.lastrowid - SCHEDULER_HISTORY,))
+    conn.commit()
+    conn.close()
+
+# Função para executar uma tarefa, medindo a duração e gravando o resultado no histórico.
+# Devolve False se a tarefa já estiver em curso neste processo
+def run_job(name, state):
+    lock = state['locks'][name]
+    if not lock.acquire(blocking=False):
+        return False
+    
+    started_at = datetime.now()
+    start = time.perf_counter()
+    try:
+        with timed_block(f"job:{name}"):
+            detail = SCHEDULED_JOBS[name]['func']()
+        status = "ok"
+    except Exception as e:
+        detail = str(e)
+        status = "erro"
+    finally:
+        lock.release()
+    
+    record_job_run(name, started_at, time.perf_counter() - start, status, detail, state['owner'])
+    
+    # Uma execução pedida no painel também adia a próxima execução agendada
+    if name in state['next_run']:
+        state['next_run'][name] = next_job_run(SCHEDULED_JOBS[name]['interval'])
+    return True
+
+# Função para calcular o próximo instante de execução (em segundos desde a época), com variação aleatória
+def next_job_run(interval, last_run=None):
+    delay = interval * (1 + random.uniform(-SCHEDULER_JITTER, SCHEDULER_JITTER))
+    return (last_run or time.time()) + delay
+
+# Função para obter a última execução de cada tarefa (no histórico ou fora do agendador), em segundos desde a época
+@timed
+def last_job_runs():
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    execute_query(c, "SELECT job, MAX(started_at) FROM scheduler_runs GROUP BY job")
+    last_runs = {job: datetime.fromisoformat(started_at).timestamp() for job, started_at in c.fetchall()}
+    conn.close()
+    
+    for name, job in SCHEDULED_JOBS.items():
+        if job['last_run']:
+            external = job['last_run']()
+            if external and external > last_runs.get(name, 0):
+                last_runs[name] = external
+    return last_runs
+
+# Ciclo do agendador: em cada verificação renova a liderança e, se for o líder, executa as tarefas em atraso,
+# uma de cada vez. Tarefas sem execução anterior correm logo na primeira verificação
+def scheduler_loop(state):
+    while True:
+        try:
+            state['leader'] = acquire_scheduler_lease(state['owner'])
+            if state['leader']:
+                if not state['next_run']:
+                    last_runs = last_job_runs()
+                    state['next_run'] = {name: next_job_run(job['interval'], last_runs[name]) if name in last_runs
+                                         else time.time() for name, job in SCHEDULED_JOBS.items()}
+                
+                for name, job in SCHEDULED_JOBS.items():
+                    if time.time() < state['next_run'][name]:
+                        continue
+                    if not acquire_scheduler_lease(state['owner']):
+                        state['leader'] = False
+                        break
+                    run_job(name, state)
+            else:
+                # Ao recuperar a liderança, as próximas execuções voltam a ser calculadas a partir do histórico
+                state['next_run'] = {}
+        except sqlite3.Error as e:
+            state['leader'] = False
+            logging.getLogger(__name__).warning("Agendador de manutenção: %s", e)
+        time.sleep(SCHEDULER_TICK_SECONDS)
+
+# Função para iniciar, uma única vez por processo, o agendador das tarefas de manutenção
+@st.cache_resource
+def start_scheduler():
+    if SCHEDULER_ENABLED and SCHEDULED_JOBS:
+        threading.Thread(target=scheduler_loop, args=(get_scheduler_state(),), name="hpo-scheduler",
+                         daemon=True).start()
+    return True
+
+# Função para obter o resumo das tarefas registadas: intervalo, execuções, tempos e resultado da última execução
+@timed
+def scheduler_job_summary():
+    conn = sqlite3.connect(DB_PATH)
+    runs_df = read_sql('''SELECT r.job, COUNT(*) AS runs, SUM(r.status = 'erro') AS failures,
+                                 AVG(r.seconds) AS avg_seconds, MAX(r.seconds) AS max_seconds,
+                                 last.started_at, last.seconds, last.status, last.detail
+                          FROM scheduler_runs r
+                          JOIN scheduler_runs last ON last.id = (SELECT MAX(id) FROM scheduler_runs WHERE job = r.job)
+                          GROUP BY r.job''', conn).set_index('job')
+    conn.close()
+    
+    next_run = get_scheduler_state()['next_run']
+    rows = []
+    for name, job in SCHEDULED_JOBS.items():
+        run = runs_df.loc[name] if name in runs_df.index else None
+        rows.append({
+            'Tarefa': name,
+            'Descrição': job['description'],
+            'Intervalo (min)': round(job['interval'] / 60, 1),
+            'Próxima execução': datetime.fromtimestamp(next_run[name]).strftime('%Y-%m-%d %H:%M:%S')
+                                if name in next_run else "",
+            'Última execução': str(run['started_at'])[:19] if run is not None else "",
+            'Resultado': f"{run['status']}: {run['detail']}" if run is not None else "",
+            'Duração (s)': round(run['seconds'], 3) if run is not None else None,
+            'Média (s)': round(run['avg_seconds'], 3) if run is not None else None,
+            'Máximo (s)': round(run['max_seconds'], 3) if run is not None else None,
+            'Execuções': int(run['runs']) if run is not None else 0,
+            'Falhas': int(run['failures']) if run is not None else 0
+        })
+    return pd.DataFrame(rows)
+
+# Função para obter as últimas execuções das tarefas agendadas
+@timed
+def scheduler_history(limit=50):
+    conn = sqlite3.connect(DB_PATH)
+    history_df = read_sql('''SELECT started_at AS "Início", job AS "Tarefa", ROUND(seconds, 3) AS "Duração (s)",
+                                    status AS "Estado", detail AS "Resultado", owner AS "Processo"
+                             FROM scheduler_runs ORDER BY id DESC LIMIT ?''', conn, params=(limit,))
+    conn.close()
+    return history_df
+
+# Bases de dados de respostas de todas as campanhas (a base de dados principal e os ficheiros das restantes)
+def all_response_db_paths():
+    return [DB_PATH] + [campaign_db_path(campaign[2]) for campaign in get_campaigns() if campaign[2]]
+
+# Tarefa: pré-carregar a cache das respostas e da distribuição da campanha ativa (período completo, o que os
+# painéis mostram por omissão), para que o primeiro painel aberto depois de novas respostas não espere pelo SQLite
+def warm_caches_job():
+    hpo_rows = len(cached_hpo_responses())
+    lideranca_rows = len(cached_lideranca_responses())
+    cached_hpo_distribution()
+    return f"{hpo_rows} respostas HPO, {lideranca_rows} respostas de Liderança em cache"
+
+# Tarefa: atualizar os snapshots colunares da campanha ativa com as respostas novas
+def refresh_snapshots_job():
+    if not ANALYTICS_SNAPSHOTS:
+        return "snapshots desativados"
+    for table in DATA_VERSION_TABLES:
+        refresh_snapshot(table)
+    return f"{len(DATA_VERSION_TABLES)} snapshots atualizados"
+
+# Tarefa: transferir o WAL para a base de dados e truncá-lo (só se aplica às bases de dados em modo WAL)
+@timed
+def wal_checkpoint_job():
+    results = []
+    for db_path in all_response_db_paths():
+        conn = sqlite3.connect(db_path, timeout=30)
+        c = conn.cursor()
+        execute_query(c, "PRAGMA journal_mode")
+        if c.fetchone()[0] == 'wal':
+            execute_query(c, "PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, log_pages, checkpointed = c.fetchone()
+            results.append(f"{os.path.basename(db_path)}: {checkpointed}/{log_pages} páginas"
+                           + (" (ocupada)" if busy else ""))
+        conn.close()
+    return "; ".join(results) or "sem bases de dados em modo WAL"
+
+# Tarefa: atualizar as estatísticas do planeador de consultas (PRAGMA optimize) de todas as bases de dados
+@timed
+def optimize_job():
+    for db_path in all_response_db_paths():
+        conn = sqlite3.connect(db_path, timeout=30)
+        execute_query(conn.cursor(), "PRAGMA optimize")
+        conn.close()
+    return f"{len(all_response_db_paths())} bases de dados"
+
+# Tarefa: cópia de segurança agendada (partilha o bloqueio das cópias manuais)
+def backup_job():
+    state = get_backup_state()
+    if not state['lock'].acquire(blocking=False):
+        return "cópia já em curso"
+    backup_worker(state, "agendada")
+    if state['error']:
+        raise RuntimeError(state['error'])
+    return f"{state['last']['name']}: {len(state['last']['files'])} ficheiros"
+
+# Função para obter o instante da cópia de segurança mais recente (incluindo as manuais)
+def last_backup_time():
+    backups = list_backups()
+    return datetime.fromisoformat(backups[0]['created_at']).timestamp() if backups else None
+
+register_job('cache', warm_caches_job, job_interval('cache', 5), "Pré-carregar a cache das respostas")
+register_job('snapshots', refresh_snapshots_job, job_interval('snapshots', 10), "Atualizar os snapshots colunares")
+# O checkpoint só é registado com as bases de dados em WAL (com o diário de rollback não há nada a transferir)
+if JOURNAL_MODE == 'wal':
+    register_job('checkpoint', wal_checkpoint_job, job_interval('checkpoint', 60), "Checkpoint do WAL")
+register_job('optimize', optimize_job, job_interval('optimize', 24 * 60), "PRAGMA optimize")
+register_job('backup', backup_job, BACKUP_INTERVAL_HOURS * 3600, "Cópia de segurança", last_run=last_backup_time)
+
+# Função para inserir uma resposta HPO e atualizar as agregações temporais (na transação do chamador).
+# session_id é o identificador da submissão: se já existir, nada é gravado e a função devolve False
+def insert_hpo_response(c, responses, comentario="", session_id=None, timestamp=None):
+    timestamp = timestamp or datetime.now()
+    
+    execute_query(c, '''INSERT OR IGNORE INTO responses
+                 (timestamp, a1, a2, b1, b2, c1, c2, d1, d2, e1, e2, f1, f2, g1, g2, comentario, session_id)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                 (timestamp,) + tuple(responses) + (comentario, session_id or str(uuid.uuid4())))
+    if c.rowcount != 1:
+        return False
+    
+    # Atualizar as agregações temporais na mesma transação
+    update_hpo_rollups(c, timestamp, responses)
+    return True
+
+# Função para salvar resposta do questionário HPO
+@timed
+def save_hpo_response(responses, comentario="", session_id=None):
+    return save_hpo_responses([(responses, comentario, session_id)]) == 1
+
+# Função para salvar várias respostas HPO numa única transação; devolve o número de respostas novas
+@timed
+def save_hpo_responses(submissions):
+    conn = sqlite3.connect(responses_db_path())
     c = conn.cursor()
     
+    inserted = 0
+    for responses, comentario, session_id in submissions:
+        inserted += insert_hpo_response(c, responses, comentario, session_id)
+    if inserted:
+        bump_data_version(c, ['responses'])
+    
+    conn.commit()
+    conn.close()
+    
+    if inserted:
+        clear_response_caches()
+    return inserted
+
+# Função para inserir as respostas de uma sessão de Liderança (na transação do chamador);
+# timestamps permite gravar a hora a que cada resposta foi dada (diário do quiosque).
+# Respostas já gravadas para a mesma sessão e questão são ignoradas; devolve o número de linhas novas
+def insert_lideranca_response(c, session_id, question_data, timestamps=None):
+    inserted = 0
+    
     # Inserir cada resposta individualmente
     for i, (question_id, response, response_time) in enumerate(question_data, 1):
-        c.execute('''INSERT INTO lideranca_responses 
+        timestamp = timestamps[i - 1] if timestamps else datetime.now()
+        execute_query(c, '''INSERT OR IGNORE INTO lideranca_responses
                      (session_id, timestamp, question_id, response, response_time)
                      VALUES (?, ?, ?, ?, ?)''',
-                     (session_id, datetime.now(), f"q{i}", response, response_time))
+                     (session_id, timestamp, f"q{i}", response, response_time))
+        if c.rowcount != 1:
+            continue
+        
+        # Atualizar as agregações temporais na mesma transação
+        update_lideranca_rollups(c, timestamp, f"q{i}", response)
+        inserted += 1
+    
+    return inserted
+
+# Função para salvar resposta do questionário de Liderança
+@timed
+def save_lideranca_response(session_id, question_data):
+    return save_lideranca_responses([(session_id, question_data)]) == 1
+
+# Função para salvar várias sessões de Liderança numa única transação; devolve o número de sessões novas
+@timed
+def save_lideranca_responses(sessions):
+    conn = sqlite3.connect(responses_db_path())
+    c = conn.cursor()
+    
+    inserted = 0
+    for session_id, question_data in sessions:
+        inserted += insert_lideranca_response(c, session_id, question_data) > 0
+    if inserted:
+        bump_data_version(c, ['lideranca_responses'])
+    
+    conn.commit()
+    conn.close()
+    
+    if inserted:
+        clear_response_caches()
+    return inserted
+
+# Função para validar uma submissão HPO recebida em JSON (mesmas regras do questionário: 14 inteiros de 1 a 7)
+def validate_hpo_submission(data):
+    if not isinstance(data, dict) or not isinstance(data.get('responses'), dict):
+        raise ValueError("O campo 'responses' deve ser um objeto com as questões a1 a g2")
+    
+    answers = data['responses']
+    missing = [item for item in HPO_ITEMS if item not in answers]
+    unknown = [item for item in answers if item not in HPO_ITEMS]
+    if missing or unknown:
+        raise ValueError(f"Questões em falta: {missing}; questões desconhecidas: {unknown}")
+    
+    responses = []
+    for item in HPO_ITEMS:
+        value = answers[item]
+        if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 7:
+            raise ValueError(f"A resposta a {item} deve ser um inteiro de 1 a 7")
+        responses.append(value)
+    
+    comentario = data.get('comentario', "")
+    if not isinstance(comentario, str):
+        raise ValueError("O campo 'comentario' deve ser texto")
+    
+    # Identificador opcional da submissão: reenviar o mesmo pedido não duplica a resposta
+    session_id = data.get('session_id') or str(uuid.uuid4())
+    if not isinstance(session_id, str):
+        raise ValueError("O campo 'session_id' deve ser texto")
+    
+    return responses, comentario, session_id
+
+# Função para validar uma sessão de Liderança recebida em JSON (seis respostas 'a'/'b', por ordem)
+def validate_lideranca_submission(data):
+    if not isinstance(data, dict) or not isinstance(data.get('answers'), list):
+        raise ValueError("O campo 'answers' deve ser uma lista com as respostas q1 a q6")
+    
+    answers = data['answers']
+    if len(answers) != len(LIDERANCA_CORRECT_ANSWERS):
+        raise ValueError(f"São necessárias {len(LIDERANCA_CORRECT_ANSWERS)} respostas")
+    
+    question_data = []
+    for question_id, answer in zip(LIDERANCA_CORRECT_ANSWERS, answers):
+        if not isinstance(answer, dict) or answer.get('question_id', question_id) != question_id:
+            raise ValueError(f"As respostas devem vir pela ordem q1 a q6 (esperada {question_id})")
+        if answer.get('response') not in LIDERANCA_OPTIONS:
+            raise ValueError(f"A resposta a {question_id} deve ser 'a' ou 'b'")
+        
+        response_time = answer.get('response_time', 0.0)
+        if isinstance(response_time, bool) or not isinstance(response_time, (int, float)) or response_time < 0:
+            raise ValueError(f"O tempo de resposta de {question_id} deve ser um número não negativo")
+        question_data.append((question_id, answer['response'], float(response_time)))
+    
+    session_id = data.get('session_id') or str(uuid.uuid4())
+    if not isinstance(session_id, str):
+        raise ValueError("O campo 'session_id' deve ser texto")
+    
+    return session_id, question_data
+
+# Diário local do modo quiosque: quando definido, as submissões são acrescentadas a este ficheiro
+# (uma linha JSON por submissão) em vez de gravadas na base de dados, e enviadas depois com kiosk_sync.py
+KIOSK_JOURNAL = os.environ.get('HPO_KIOSK_JOURNAL')
+
+@st.cache_resource
+def get_journal_lock():
+    return threading.Lock()
+
+# Função para acrescentar um registo ao diário (gravado em disco antes de a submissão ser confirmada)
+def append_to_journal(record, path=None):
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with get_journal_lock():
+        with open(path or KIOSK_JOURNAL, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+# Funções para registar uma submissão: no diário do quiosque ou diretamente na base de dados
+def record_hpo_submission(responses, comentario, session_id):
+    if KIOSK_JOURNAL:
+        append_to_journal({
+            'type': 'hpo',
+            'session_id': session_id,
+            'timestamp': datetime.now().isoformat(),
+            'responses': dict(zip(HPO_ITEMS, responses)),
+            'comentario': comentario
+        })
+    else:
+        save_hpo_response(responses, comentario, session_id)
+
+def record_lideranca_submission(session_id, question_data, answered_at):
+    if KIOSK_JOURNAL:
+        append_to_journal({
+            'type': 'lideranca',
+            'session_id': session_id,
+            'answers': [{'question_id': question_id, 'response': response,
+                         'response_time': response_time, 'timestamp': timestamp}
+                        for (question_id, response, response_time), timestamp in zip(question_data, answered_at)]
+        })
+    else:
+        save_lideranca_response(session_id, question_data)
+
+# Função para converter a data/hora de um registo do diário
+def parse_journal_timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Data/hora inválida: {value!r}")
+
+# Função para validar um registo do diário (mesmas regras da ingestão JSON, mais session_id e datas obrigatórios)
+def parse_journal_record(record):
+    if not isinstance(record, dict) or record.get('type') not in ('hpo', 'lideranca'):
+        raise ValueError("Registo sem tipo 'hpo' ou 'lideranca'")
+    
+    session_id = record.get('session_id')
+    if not isinstance(session_id, str) or not session_id:
+        raise ValueError("Registo sem session_id")
+    
+    if record['type'] == 'hpo':
+        responses, comentario, _ = validate_hpo_submission(record)
+        return 'hpo', session_id, (responses, comentario, parse_journal_timestamp(record.get('timestamp')))
+    
+    _, question_data = validate_lideranca_submission(record)
+    timestamps = [parse_journal_timestamp(answer.get('timestamp')) for answer in record['answers']]
+    return 'lideranca', session_id, (question_data, timestamps)
+
+# Função para gravar registos do diário do quiosque numa única transação, ignorando sessões já gravadas
+@timed
+def sync_journal_records(records):
+    result = {'hpo': 0, 'lideranca': 0, 'duplicates': 0, 'invalid': []}
+    pending = {'hpo': {}, 'lideranca': {}}
+    
+    for index, record in enumerate(records):
+        try:
+            kind, session_id, payload = parse_journal_record(record)
+        except ValueError as e:
+            result['invalid'].append((index, str(e)))
+            continue
+        
+        if session_id in pending[kind]:
+            result['duplicates'] += 1
+        else:
+            pending[kind][session_id] = payload
+    
+    conn = sqlite3.connect(responses_db_path())
+    c = conn.cursor()
+    
+    # Sessões já gravadas são ignoradas pelos índices únicos (INSERT OR IGNORE)
+    for session_id, (responses, comentario, timestamp) in pending['hpo'].items():
+        result['hpo'] += insert_hpo_response(c, responses, comentario, session_id, timestamp)
+    for session_id, (question_data, timestamps) in pending['lideranca'].items():
+        result['lideranca'] += insert_lideranca_response(c, session_id, question_data, timestamps) > 0
+    result['duplicates'] += len(pending['hpo']) - result['hpo'] + len(pending['lideranca']) - result['lideranca']
+    
+    changed = [table for kind, table in (('hpo', 'responses'), ('lideranca', 'lideranca_responses')) if result[kind]]
+    if changed:
+        bump_data_version(c, changed)
     
     conn.commit()
     conn.close()
+    
+    if changed:
+        clear_response_caches()
+    
+    return result
+
+# Função para construir a cláusula WHERE de um filtro por período (datas inclusivas)
+def period_where(start_date=None, end_date=None, column='timestamp'):
+    conditions = []
+    params = []
+    
+    if start_date is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(start_date.strftime('%Y-%m-%d'))
+    
+    if end_date is not None:
+        # Limite superior exclusivo no dia seguinte, para incluir todo o último dia
+        conditions.append(f"{column} < ?")
+        params.append((end_date + timedelta(days=1)).strftime('%Y-%m-%d'))
+    
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+# Modo compacto dos DataFrames de respostas (compact=True nos carregamentos).
+# Orçamento de memória por 1M de linhas (medido com benchmarks/memory_budget.py, sem o texto dos comentários):
+# - HPO: id int32 (4 MB) + timestamp datetime64 (8 MB) + 14 questões int8 (14 MB) + ponteiros de comentario (8 MB) ≈ 34 MB
+# - Liderança: id int32 (4 MB) + timestamp datetime64 (8 MB) + question_id/response categóricos (2 MB)
+#   + response_time float32 (4 MB) + session_id categórico (4 MB de códigos + ~15 MB para os ~167k textos únicos) ≈ 40 MB
+# Com os tipos originais os mesmos dados ocupam cerca de 200 MB (HPO) e 295 MB (Liderança).
+COMPACT_MEMORY_BUDGET_MB = {
+    'hpo': 34,
+    'lideranca': 40
+}
+
+# Função para converter um DataFrame de respostas HPO para tipos compactos
+def compact_hpo_frame(df):
+    # O identificador da submissão não é usado nas análises
+    df = df.drop(columns=['session_id'], errors='ignore')
+    df['id'] = df['id'].astype('int32')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce')
+    for item in HPO_ITEMS:
+        # Valores sempre entre 1 e 7; 'Int8' apenas se existirem valores em falta
+        df[item] = df[item].astype('Int8' if df[item].isna().any() else 'int8')
+    return df
+
+# Função para converter um DataFrame de respostas de Liderança para tipos compactos
+def compact_lideranca_frame(df, intern_sessions=True):
+    df['id'] = df['id'].astype('int32')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', errors='coerce')
+    df['question_id'] = df['question_id'].astype('category')
+    df['response'] = df['response'].astype('category')
+    df['response_time'] = df['response_time'].astype('float32')
+    if intern_sessions:
+        # Cada sessão repete-se em 6 linhas: guardar cada identificador apenas uma vez
+        df['session_id'] = df['session_id'].astype('category')
+    return df
 
-# Função para carregar todas as respostas HPO
-def load_hpo_responses():
-    conn = sqlite3.connect('hpo_survey.db')
+# Função para carregar as respostas HPO (opcionalmente apenas de um período)
+@timed
+def load_hpo_responses(start_date=None, end_date=None, compact=False):
+    conn = sqlite3.connect(responses_db_path())
+    where, params = period_where(start_date, end_date)
     
     # Verificar se a coluna comentario existe
     c = conn.cursor()
-    c.execute("PRAGMA table_info(responses)")
+    execute_query(c, "PRAGMA table_info(responses)")
     columns = [column[1] for column in c.fetchall()]
     
     if 'comentario' not in columns:
         # Se a coluna não existir, criar uma coluna dummy
-        df = pd.read_sql_query("SELECT * FROM responses", conn)
+        df = read_sql(f"SELECT * FROM responses{where}", conn, params=params)
         df['comentario'] = ''  # Adicionar coluna vazia
     else:
-        df = pd.read_sql_query("SELECT * FROM responses", conn)
+        df = read_sql(f"SELECT * FROM responses{where}", conn, params=params)
     
     conn.close()
+    
+    if compact:
+        df = compact_hpo_frame(df)
+    
     return df
 
-# Função para carregar todas as respostas de Liderança (modificada)
-def load_lideranca_responses():
-    conn = sqlite3.connect('hpo_survey.db')
-    df = pd.read_sql_query("SELECT * FROM lideranca_responses", conn)
+# Função para carregar as respostas de Liderança (opcionalmente apenas de um período)
+@timed
+def load_lideranca_responses(start_date=None, end_date=None, compact=False, intern_sessions=True):
+    conn = sqlite3.connect(responses_db_path())
+    where, params = period_where(start_date, end_date)
+    df = read_sql(f"SELECT * FROM lideranca_responses{where}", conn, params=params)
     conn.close()
+    
+    if compact:
+        df = compact_lideranca_frame(df, intern_sessions)
+    
     return df
 
+# Diretório dos snapshots colunares (Parquet) usados pelas análises (relativo ao diretório de cada base de dados)
+SNAPSHOT_DIR = os.environ.get('HPO_SNAPSHOT_DIR', 'snapshots')
+# Usar snapshots nas análises (ativo por omissão quando o PyArrow está instalado)
+ANALYTICS_SNAPSHOTS = PYARROW_AVAILABLE and os.environ.get('HPO_ANALYTICS_SNAPSHOTS', '1') == '1'
+# Número de partes a partir do qual o snapshot de uma tabela é compactado num único ficheiro
+SNAPSHOT_MAX_PARTS = 32
+
+# Esquema colunar de cada tabela de respostas (tipos compactos) e colunas a devolver como categóricas
+def snapshot_schema(table):
+    if table == 'responses':
+        return pa.schema([('id', pa.int32()), ('timestamp', pa.timestamp('us'))]
+                         + [(item, pa.int8()) for item in HPO_ITEMS]
+                         + [('comentario', pa.string())])
+    return pa.schema([
+        ('id', pa.int32()),
+        ('session_id', pa.string()),
+        ('timestamp', pa.timestamp('us')),
+        ('question_id', pa.string()),
+        ('response', pa.string()),
+        ('response_time', pa.float32())
+    ])
+
+SNAPSHOT_CATEGORICAL = {
+    'responses': [],
+    'lideranca_responses': ['session_id', 'question_id', 'response']
+}
+
+# Função para obter o diretório do snapshot de uma tabela de uma base de dados (por omissão a da campanha atual).
+# Cada base de dados tem o seu snapshot, ao lado do ficheiro: <diretório da base de dados>/snapshots/<ficheiro>/<tabela>.
+# Os processos que usam a mesma base de dados partilham-no, protegidos por snapshot_lock
+def snapshot_table_dir(table, db_path=None):
+    db_path = db_path or responses_db_path()
+    return os.path.join(os.path.dirname(db_path), SNAPSHOT_DIR, os.path.splitext(os.path.basename(db_path))[0], table)
+
+# Estado dos snapshots partilhado por todas as sessões do processo
+@st.cache_resource
+def get_snapshot_lock():
+    return threading.Lock()
+
+# Lock do snapshot de uma tabela entre threads e entre processos (réplicas que usam a mesma base de dados):
+# flock exclusivo sobre o ficheiro LOCK do diretório do snapshot. Não é reentrante
+@contextmanager
+def snapshot_lock(table, db_path=None):
+    table_dir = snapshot_table_dir(table, db_path)
+    os.makedirs(table_dir, exist_ok=True)
+    
+    with get_snapshot_lock():
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(table_dir, 'LOCK'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+# Função para listar as partes do snapshot de uma tabela, ordenadas pelo primeiro id
+def snapshot_parts(table, db_path=None):
+    table_dir = snapshot_table_dir(table, db_path)
+    if not os.path.isdir(table_dir):
+        return []
+    
+    parts = []
+    for filename in os.listdir(table_dir):
+        if filename.startswith('part-') and filename.endswith('.parquet'):
+            first_id, last_id = filename[5:-8].split('-')
+            parts.append((int(first_id), int(last_id), os.path.join(table_dir, filename)))
+    return sorted(parts)
+
+# Função para apagar o snapshot de uma tabela (com o snapshot_lock da tabela obtido)
+def clear_snapshots(table, db_path=None):
+    for _, _, path in snapshot_parts(table, db_path):
+        os.remove(path)
+
+# Função para gravar um DataFrame como nova parte do snapshot (escrita atómica)
+def write_snapshot_part(table, df):
+    table_dir = snapshot_table_dir(table)
+    os.makedirs(table_dir, exist_ok=True)
+    
+    arrow_table = pa.Table.from_pandas(df, schema=snapshot_schema(table), preserve_index=False).replace_schema_metadata(None)
+    path = os.path.join(table_dir, f"part-{int(df['id'].min()):012d}-{int(df['id'].max()):012d}.parquet")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    
+    pq.write_table(arrow_table, tmp_path)
+    os.replace(tmp_path, path)
+
+# Funções para ler e gravar a geração dos dados (data_version) a que o snapshot corresponde
+def read_snapshot_generation(table):
+    try:
+        with open(os.path.join(snapshot_table_dir(table), 'GENERATION')) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+def write_snapshot_generation(table, generation):
+    table_dir = snapshot_table_dir(table)
+    os.makedirs(table_dir, exist_ok=True)
+    tmp_path = os.path.join(table_dir, f"GENERATION.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(str(generation))
+    os.replace(tmp_path, os.path.join(table_dir, 'GENERATION'))
+
+# Função para atualizar o snapshot de uma tabela com as linhas novas do SQLite (com o snapshot_lock da tabela obtido)
+@timed
+def update_snapshot(table):
+    parts = snapshot_parts(table)
+    
+    conn = sqlite3.connect(responses_db_path())
+    c = conn.cursor()
+    execute_query(c, f"SELECT MAX(id) FROM {table}")
+    db_max_id = c.fetchone()[0] or 0
+    execute_query(c, "SELECT generation FROM data_version WHERE name = ?", (table,))
+    generation = c.fetchone()[0]
+    
+    snapshot_max_id = parts[-1][1] if parts else 0
+    overlapping = any(parts[i][0] <= parts[i - 1][1] for i in range(1, len(parts)))
+    
+    # Linhas apagadas (reset, possivelmente noutra réplica) ou partes sobrepostas: reconstruir o snapshot do zero
+    if db_max_id < snapshot_max_id or overlapping or read_snapshot_generation(table) != generation:
+        clear_snapshots(table)
+        parts = []
+        snapshot_max_id = 0
+    
+    if db_max_id > snapshot_max_id:
+        new_df = read_sql(f"SELECT * FROM {table} WHERE id > ? ORDER BY id", conn, params=(snapshot_max_id,))
+        if table == 'responses':
+            new_df = compact_hpo_frame(new_df)
+        else:
+            new_df = compact_lideranca_frame(new_df, intern_sessions=False)
+        write_snapshot_part(table, new_df)
+        parts = snapshot_parts(table)
+    
+    write_snapshot_generation(table, generation)
+    conn.close()
+    
+    # Demasiadas partes pequenas: juntar tudo num único ficheiro
+    if len(parts) > SNAPSHOT_MAX_PARTS:
+        merged_df = read_snapshot(table)
+        clear_snapshots(table)
+        write_snapshot_part(table, merged_df)
+
+# Função para atualizar o snapshot de uma tabela, obtendo o seu lock
+@timed
+def refresh_snapshot(table):
+    with snapshot_lock(table):
+        update_snapshot(table)
+
+# Função para ler o snapshot de uma tabela (com memory-map), opcionalmente filtrado por período
+def read_snapshot(table, start_date=None, end_date=None):
+    paths = [path for _, _, path in snapshot_parts(table)]
+    dataset = ds.dataset(paths, schema=snapshot_schema(table), format='parquet',
+                         filesystem=pafs.LocalFileSystem(use_mmap=True))
+    
+    conditions = []
+    if start_date is not None:
+        conditions.append(ds.field('timestamp') >= pa.scalar(datetime.combine(start_date, datetime.min.time()), pa.timestamp('us')))
+    if end_date is not None:
+        conditions.append(ds.field('timestamp') < pa.scalar(datetime.combine(end_date + timedelta(days=1), datetime.min.time()), pa.timestamp('us')))
+    
+    arrow_filter = None
+    for condition in conditions:
+        arrow_filter = condition if arrow_filter is None else arrow_filter & condition
+    
+    arrow_table = dataset.to_table(filter=arrow_filter)
+    for column in SNAPSHOT_CATEGORICAL[table]:
+        index = arrow_table.schema.get_field_index(column)
+        arrow_table = arrow_table.set_column(index, column, pc.dictionary_encode(arrow_table.column(column)))
+    
+    return arrow_table.to_pandas()
+
+# Função para carregar respostas a partir do snapshot colunar, atualizando-o antes
+@timed
+def load_snapshot(table, start_date=None, end_date=None):
+    # As partes são listadas e lidas sob o mesmo lock da atualização: outro processo não as pode apagar a meio
+    with snapshot_lock(table):
+        update_snapshot(table)
+        if snapshot_parts(table):
+            return read_snapshot(table, start_date, end_date)
+    
+    # Tabela vazia: devolver um DataFrame vazio com as colunas do SQLite
+    if table == 'responses':
+        return load_hpo_responses(start_date, end_date, compact=True)
+    return load_lideranca_responses(start_date, end_date, compact=True)
+
+# Versões em cache dos carregamentos, uma entrada por período selecionado, campanha e versão dos dados.
+# A versão vem da tabela data_version, pelo que uma escrita feita por outra réplica invalida a cache
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def load_cached_hpo_responses(start_date, end_date, db_path, data_version):
+    if ANALYTICS_SNAPSHOTS:
+        return load_snapshot('responses', start_date, end_date)
+    return load_hpo_responses(start_date, end_date, compact=True)
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def load_cached_lideranca_responses(start_date, end_date, db_path, data_version):
+    if ANALYTICS_SNAPSHOTS:
+        return load_snapshot('lideranca_responses', start_date, end_date)
+    return load_lideranca_responses(start_date, end_date, compact=True)
+
+def cached_hpo_responses(start_date=None, end_date=None):
+    return load_cached_hpo_responses(start_date, end_date, responses_db_path(), get_data_version('responses'))
+
+def cached_lideranca_responses(start_date=None, end_date=None):
+    return load_cached_lideranca_responses(start_date, end_date, responses_db_path(),
+                                           get_data_version('lideranca_responses'))
+
+# Função para libertar a cache das respostas deste processo após uma nova submissão ou reset
+def clear_response_caches():
+    load_cached_hpo_responses.clear()
+    load_cached_lideranca_responses.clear()
+    load_cached_hpo_distribution.clear()
+    load_cached_lideranca_scores.clear()
+    load_cached_response_times.clear()
+    load_cached_lideranca_options.clear()
+
+# Função para classificar uma pontuação média HPO segundo o protocolo
+def classify_hpo_score(avg_total):
+    if avg_total >= 12:
+        return "Elevado desempenho"
+    elif avg_total >= 9:
+        return "Médio"
+    else:
+        return "Oportunidade de melhoria"
+
+# Valor crítico da distribuição normal para os intervalos de confiança a 95%
+CONFIDENCE_Z = 1.96
+
+# Função para calcular o desvio-padrão, o erro-padrão e o intervalo de confiança a 95% da média de cada dimensão
+# a partir do número de respostas, da soma e da soma dos quadrados dos totais (sem voltar a ler as respostas).
+# Com menos de duas respostas a dispersão não está definida: os valores são NaN
+def hpo_dispersion(n, sums, sums_sq):
+    dispersion = {}
+    for dim in sums:
+        mean = sums[dim] / n
+        variance = max(sums_sq[dim] - n * mean ** 2, 0.0) / (n - 1) if n > 1 else float('nan')
+        std_error = (variance / n) ** 0.5
+        dispersion[dim] = {
+            'desvio_padrao': variance ** 0.5,
+            'erro_padrao': std_error,
+            'ic_inferior': mean - CONFIDENCE_Z * std_error,
+            'ic_superior': mean + CONFIDENCE_Z * std_error
+        }
+    return dispersion
+
+# Funções para formatar uma estatística ou um intervalo, com "—" quando não está definido (NaN)
+def format_stat(value, digits=2):
+    return "—" if pd.isna(value) else f"{value:.{digits}f}"
+
+def format_interval(low, high, separator="–"):
+    return "—" if pd.isna(low) or pd.isna(high) else f"{low:.2f}{separator}{high:.2f}"
+
 # Função para calcular estatísticas HPO
+@timed
 def calculate_hpo_stats(df):
     if df.empty:
         return None, None, None, None
     
     # Calcular totais por dimensão (soma das duas questões, máximo de 14 pontos)
-    dimensions = {
-        'A. Informação partilhada e comunicação aberta': ['a1', 'a2'],
-        'B. Visão forte: objetivo e valores': ['b1', 'b2'],
-        'C. Aprendizagem contínua': ['c1', 'c2'],
-        'D. Focalização constante nos resultados dos clientes': ['d1', 'd2'],
-        'E. Sistemas e estruturas enérgicos': ['e1', 'e2'],
-        'F. Poder partilhado e envolvimento elevado': ['f1', 'f2'],
-        'G. Liderança': ['g1', 'g2']
-    }
+    dimensions = HPO_DIMENSIONS
+    
+    # Matriz dos totais por dimensão (uma coluna por dimensão, uma linha por resposta). Os valores em falta
+    # (colunas 'Int8' do formato compacto, NaN do snapshot) contam como 0, tal como na soma do pandas
+    totals = np.column_stack([df[cols].fillna(0).to_numpy(dtype='int64').sum(axis=1) for cols in dimensions.values()])
     
-    # Calcular totais por dimensão para cada resposta
-    dimension_totals = {}
-    for dim, cols in dimensions.items():
-        dimension_totals[dim] = df[cols].sum(axis=1)
+    # Somas e somas dos quadrados de todas as dimensões numa só passagem: dão a média e a dispersão
+    sums = dict(zip(dimensions, totals.sum(axis=0).tolist()))
+    sums_sq = dict(zip(dimensions, (totals * totals).sum(axis=0).tolist()))
     
     # Calcular médias dos totais por dimensão
     stats = {}
-    for dim, totals in dimension_totals.items():
-        stats[dim] = totals.mean()
+    for dim in dimensions:
+        stats[dim] = sums[dim] / len(df)
     
     # Classificar o desempenho por dimensão
     performance = {}
     for dim, avg_total in stats.items():
-        if avg_total >= 12:
-            performance[dim] = "Elevado desempenho"
-        elif avg_total >= 9:
-            performance[dim] = "Médio"
-        else:
-            performance[dim] = "Oportunidade de melhoria"
+        performance[dim] = classify_hpo_score(avg_total)
     
     # Calcular desempenho geral da organização
     overall_avg = sum(stats.values()) / len(stats)
-    if overall_avg >= 12:
-        overall_performance = "Elevado desempenho"
-    elif overall_avg >= 9:
-        overall_performance = "Médio"
-    else:
-        overall_performance = "Oportunidade de melhoria"
+    overall_performance = classify_hpo_score(overall_avg)
     
-    return stats, performance, overall_performance, dimension_totals
+    return stats, performance, overall_performance, hpo_dispersion(len(df), sums, sums_sq)
 
 # Função para calcular estatísticas de Liderança (modificada)
+@timed
 def calculate_lideranca_stats(df):
     if df.empty:
         return None, None
     
     # Respostas corretas (baseadas no documento)
-    correct_answers = {
-        'q1': 'b',
-        'q2': 'a',
-        'q3': 'a',
-        'q4': 'b',
-        'q5': 'a',
-        'q6': 'b'
-    }
+    correct_answers = LIDERANCA_CORRECT_ANSWERS
     
     # Calcular pontuação por questão
     question_stats = {}
@@ -539,36 +2386,308 @@ def calculate_lideranca_stats(df):
             avg_time = question_df['response_time'].mean()
             
             question_stats[q] = {
-                'corretas': correct_count,
-                'total': total_count,
-                'acuracia': accuracy,
-                'tempo_medio': avg_time
+                'corretas': correct_count,
+                'total': total_count,
+                'acuracia': accuracy,
+                'tempo_medio': avg_time
+            }
+    
+    # Calcular pontuação geral (percentagem de respostas corretas)
+    total_correct = sum(stats['corretas'] for stats in question_stats.values())
+    total_questions = sum(stats['total'] for stats in question_stats.values()) if question_stats else 0
+    overall_accuracy = (total_correct / total_questions * 100) if total_questions > 0 else 0
+    
+    return question_stats, overall_accuracy
+
+# Motor analítico usado nos painéis e relatórios: 'pandas' (referência) ou 'duckdb'
+ANALYTICS_BACKEND = os.environ.get('HPO_ANALYTICS_BACKEND', 'pandas')
+if ANALYTICS_BACKEND == 'duckdb' and not DUCKDB_AVAILABLE:
+    print("DuckDB não está instalado; a usar o motor pandas.")
+    ANALYTICS_BACKEND = 'pandas'
+
+# Ligação DuckDB em memória partilhada pelo processo (cada consulta usa o seu próprio cursor)
+@st.cache_resource
+def get_duckdb_connection():
+    return duckdb.connect(database=':memory:')
+
+# Função para escrever um caminho ou nome como literal SQL do DuckDB (aspas simples duplicadas)
+def duckdb_string(value):
+    return "'" + value.replace("'", "''") + "'"
+
+# Função para obter a origem DuckDB de uma tabela: snapshot Parquet (atualizado de forma
+# incremental) ou, sem pyarrow, o próprio ficheiro SQLite. Com pyarrow, o snapshot_lock da tabela tem de estar obtido
+def duckdb_source(table):
+    if PYARROW_AVAILABLE:
+        update_snapshot(table)
+        paths = [duckdb_string(path) for _, _, path in snapshot_parts(table)]
+        if paths:
+            return f"read_parquet([{', '.join(paths)}])"
+    
+    # Leitura direta do SQLite (a extensão sqlite do DuckDB é instalada na primeira utilização)
+    return f"sqlite_scan({duckdb_string(responses_db_path())}, {duckdb_string(table)})"
+
+# Função para executar uma consulta DuckDB sobre uma tabela de respostas filtrada por período
+def duckdb_query(table, select_sql, start_date=None, end_date=None):
+    where, params = period_where(start_date, end_date, column='CAST(timestamp AS TIMESTAMP)')
+    
+    # As partes do snapshot são lidas sob o lock da atualização: outro processo não as pode apagar a meio
+    with (snapshot_lock(table) if PYARROW_AVAILABLE else nullcontext()):
+        source = duckdb_source(table)
+        cursor = get_duckdb_connection().cursor()
+        try:
+            return cursor.execute(
+                f"WITH src AS (SELECT * FROM {source}{where}) {select_sql}",
+                [datetime.strptime(param, '%Y-%m-%d') for param in params]
+            ).df()
+        finally:
+            cursor.close()
+
+# Expressões SQL partilhadas pelas consultas DuckDB (nos totais por dimensão os valores em falta contam como 0,
+# tal como em calculate_hpo_stats)
+def duckdb_dimension_total(cols):
+    return ' + '.join(f"COALESCE({col}, 0)" for col in cols)
+
+def duckdb_dimension_averages():
+    return ', '.join(f"AVG({duckdb_dimension_total(cols)}) AS {HPO_ROLLUP_COLUMNS[dim]}" for dim, cols in HPO_DIMENSIONS.items())
+
+def duckdb_dimension_sums():
+    # Os totais passam a DOUBLE antes do quadrado (as colunas do snapshot são INT8)
+    totals = {HPO_ROLLUP_COLUMNS[dim]: f"CAST({duckdb_dimension_total(cols)} AS DOUBLE)" for dim, cols in HPO_DIMENSIONS.items()}
+    return ', '.join(f"SUM({total}) AS s_{col}, SUM({total} * {total}) AS q_{col}" for col, total in totals.items())
+
+def duckdb_correct_case():
+    cases = ' '.join(f"WHEN '{q}' THEN '{answer}'" for q, answer in LIDERANCA_CORRECT_ANSWERS.items())
+    return f"CASE WHEN response = (CASE question_id {cases} END) THEN 1 ELSE 0 END"
+
+# Função para calcular estatísticas HPO no DuckDB (mesmo resultado que calculate_hpo_stats)
+@timed
+def duckdb_hpo_stats(start_date=None, end_date=None):
+    result = duckdb_query('responses', f"SELECT COUNT(*) AS n, {duckdb_dimension_averages()}, "
+                                       f"{duckdb_dimension_sums()} FROM src", start_date, end_date)
+    
+    if result['n'].iloc[0] == 0:
+        return None, None, None, None
+    
+    stats = {dim: float(result[col].iloc[0]) for dim, col in HPO_ROLLUP_COLUMNS.items()}
+    performance = {dim: classify_hpo_score(avg_total) for dim, avg_total in stats.items()}
+    overall_performance = classify_hpo_score(sum(stats.values()) / len(stats))
+    
+    # A dispersão vem das somas e somas dos quadrados calculadas na mesma consulta
+    n = int(result['n'].iloc[0])
+    sums = {dim: float(result[f"s_{col}"].iloc[0]) for dim, col in HPO_ROLLUP_COLUMNS.items()}
+    sums_sq = {dim: float(result[f"q_{col}"].iloc[0]) for dim, col in HPO_ROLLUP_COLUMNS.items()}
+    return stats, performance, overall_performance, hpo_dispersion(n, sums, sums_sq)
+
+# Função para calcular estatísticas de Liderança no DuckDB (mesmo resultado que calculate_lideranca_stats)
+@timed
+def duckdb_lideranca_stats(start_date=None, end_date=None):
+    result = duckdb_query('lideranca_responses', f'''
+        SELECT question_id,
+               SUM({duckdb_correct_case()}) AS corretas,
+               COUNT(response) AS total,
+               AVG(response_time) AS tempo_medio
+        FROM src
+        GROUP BY question_id''', start_date, end_date).set_index('question_id')
+    
+    if result.empty:
+        return None, None
+    
+    question_stats = {}
+    for q in LIDERANCA_CORRECT_ANSWERS:
+        if q in result.index:
+            row = result.loc[q]
+            question_stats[q] = {
+                'corretas': int(row['corretas']),
+                'total': int(row['total']),
+                'acuracia': (row['corretas'] / row['total'] * 100) if row['total'] > 0 else 0,
+                'tempo_medio': float(row['tempo_medio'])
             }
     
-    # Calcular pontuação geral
     total_correct = sum(stats['corretas'] for stats in question_stats.values())
-    total_questions = sum(stats['total'] for stats in question_stats.values()) if question_stats else 0
-    overall_accuracy = (total_correct / (total_questions / 6) * 100) if total_questions > 0 else 0
+    total_questions = sum(stats['total'] for stats in question_stats.values())
+    overall_accuracy = (total_correct / total_questions * 100) if total_questions > 0 else 0
     
     return question_stats, overall_accuracy
 
+# Função para calcular a distribuição das pontuações HPO no DuckDB (mesmo formato que load_hpo_distribution)
+@timed
+def duckdb_hpo_distribution(start_date=None, end_date=None):
+    dist_df = duckdb_query('responses', f'''
+        SELECT item, value, COUNT(*) AS frequency
+        FROM (UNPIVOT (SELECT {', '.join(HPO_ITEMS)} FROM src)
+              ON {', '.join(HPO_ITEMS)} INTO NAME item VALUE value)
+        GROUP BY item, value
+        ORDER BY item, value''', start_date, end_date)
+    
+    item_dimension = {item: dim for dim, cols in HPO_DIMENSIONS.items() for item in cols}
+    dist_df['dimension'] = dist_df['item'].map(item_dimension)
+    return dist_df
+
+# Funções de análise usadas pelos painéis e relatórios, conforme o motor configurado
+def analytics_hpo_stats(df, start_date=None, end_date=None):
+    if ANALYTICS_BACKEND == 'duckdb':
+        return duckdb_hpo_stats(start_date, end_date)
+    return calculate_hpo_stats(df)
+
+def analytics_lideranca_stats(df, start_date=None, end_date=None):
+    if ANALYTICS_BACKEND == 'duckdb':
+        return duckdb_lideranca_stats(start_date, end_date)
+    return calculate_lideranca_stats(df)
+
+# Percentis apresentados para os tempos de resposta
+TIME_PERCENTILES = [50, 90, 99]
+
+# Função para calcular a pontuação (respostas corretas) e o tempo total de cada sessão de Liderança,
+# numa única passagem agrupada por session_id
+@timed
+def calculate_lideranca_sessions(df):
+    expected = df['question_id'].astype(object).map(LIDERANCA_CORRECT_ANSWERS)
+    answers = pd.DataFrame({
+        'session_id': df['session_id'],
+        'correct': (df['response'].astype(object) == expected).astype('int8'),
+        'response_time': df['response_time']
+    })
+    return answers.groupby('session_id', observed=True, sort=False).agg(
+        score=('correct', 'sum'), questions=('correct', 'size'), completion_time=('response_time', 'sum'))
+
+# Função para calcular a pontuação e o tempo total de cada sessão no DuckDB (mesmo resultado que calculate_lideranca_sessions)
+@timed
+def duckdb_lideranca_sessions(start_date=None, end_date=None):
+    return duckdb_query('lideranca_responses', f'''
+        SELECT session_id,
+               SUM({duckdb_correct_case()}) AS score,
+               COUNT(*) AS questions,
+               SUM(response_time) AS completion_time
+        FROM src
+        GROUP BY session_id''', start_date, end_date).set_index('session_id')
+
+# Função para resumir as sessões: distribuição das pontuações (0 a 6) e percentis do tempo total dos questionários completos
+def summarize_lideranca_sessions(sessions_df):
+    n_questions = len(LIDERANCA_CORRECT_ANSWERS)
+    completion_times = sessions_df.loc[sessions_df['questions'] == n_questions, 'completion_time'].dropna()
+    
+    return {
+        'sessions': len(sessions_df),
+        'complete': len(completion_times),
+        'mean_score': float(sessions_df['score'].mean()) if len(sessions_df) else 0.0,
+        'histogram': sessions_df['score'].astype(int).value_counts().reindex(range(n_questions + 1), fill_value=0),
+        'completion_percentiles': {f"p{pct}": float(completion_times.quantile(pct / 100))
+                                   for pct in TIME_PERCENTILES} if len(completion_times) else {}
+    }
+
+# Proporção cortada em cada extremo na média aparada dos tempos de resposta
+RESPONSE_TIME_TRIM = 0.1
+# Um tempo de resposta é atípico acima de Q3 + RESPONSE_TIME_OUTLIER_IQR x (Q3 - Q1) da sua questão
+# (ex.: um separador esquecido aberto durante uma hora)
+RESPONSE_TIME_OUTLIER_IQR = 3
+RESPONSE_TIME_QUANTILES = sorted({RESPONSE_TIME_TRIM, 0.25, 0.5, 0.75, 1 - RESPONSE_TIME_TRIM} | {pct / 100 for pct in TIME_PERCENTILES})
+
+# Função para organizar as estatísticas dos tempos de resposta por questão (formato comum aos dois motores)
+def response_time_frame(counts, means, quantiles, trimmed_means, outliers):
+    limits = quantiles[0.75] + RESPONSE_TIME_OUTLIER_IQR * (quantiles[0.75] - quantiles[0.25])
+    time_stats = pd.DataFrame({
+        'respostas': counts,
+        'media': means,
+        'media_aparada': trimmed_means,
+        **{f"p{pct}": quantiles[pct / 100] for pct in TIME_PERCENTILES},
+        'limite_atipico': limits,
+        'atipicas': outliers.reindex(counts.index, fill_value=0).astype(int)
+    })
+    return time_stats.reindex([q for q in LIDERANCA_CORRECT_ANSWERS if q in time_stats.index])
+
+# Função para calcular, por questão, a mediana, p90 e p99, a média aparada e o número de tempos atípicos.
+# Os quantis de todas as questões são calculados num único groupby; a média aparada e os atípicos comparam
+# cada resposta com os limites da sua questão, sem ciclos por questão
+@timed
+def calculate_response_time_stats(df):
+    times = pd.DataFrame({'question_id': df['question_id'].astype(object),
+                          'response_time': pd.to_numeric(df['response_time'])}).dropna()
+    if times.empty:
+        # Sem tempos registados (período vazio ou só respostas antigas sem tempo): tabela vazia com as mesmas colunas
+        empty = pd.Series(dtype=float)
+        return response_time_frame(empty, empty, pd.DataFrame(columns=RESPONSE_TIME_QUANTILES, dtype=float), empty, empty)
+    
+    grouped = times.groupby('question_id')['response_time']
+    quantiles = grouped.quantile(RESPONSE_TIME_QUANTILES).unstack()
+    
+    bounds = quantiles.reindex(times['question_id']).set_axis(times.index)
+    limits = bounds[0.75] + RESPONSE_TIME_OUTLIER_IQR * (bounds[0.75] - bounds[0.25])
+    trimmed = times['response_time'].where(times['response_time'].between(bounds[RESPONSE_TIME_TRIM],
+                                                                          bounds[1 - RESPONSE_TIME_TRIM]))
+    
+    return response_time_frame(grouped.count(), grouped.mean(), quantiles,
+                               trimmed.groupby(times['question_id']).mean(),
+                               (times['response_time'] > limits).groupby(times['question_id']).sum())
+
+# Função para calcular as estatísticas dos tempos de resposta no DuckDB (mesmo resultado que calculate_response_time_stats)
+@timed
+def duckdb_response_time_stats(start_date=None, end_date=None):
+    quantile_list = ', '.join(str(q) for q in RESPONSE_TIME_QUANTILES)
+    # Posição (a partir de 1) de cada quantil na lista devolvida por quantile_cont
+    qs = {q: f"qs[{position}]" for position, q in enumerate(RESPONSE_TIME_QUANTILES, 1)}
+    # A consulta continua o WITH de duckdb_query: os quantis de cada questão são calculados uma vez e juntados a cada resposta
+    result = duckdb_query('lideranca_responses', f'''
+        , q AS (SELECT question_id, COUNT(response_time) AS n, AVG(response_time) AS media,
+                       quantile_cont(response_time, [{quantile_list}]) AS qs
+                FROM src WHERE response_time IS NOT NULL GROUP BY question_id)
+        SELECT q.question_id, ANY_VALUE(n) AS n, ANY_VALUE(media) AS media, ANY_VALUE(qs) AS qs,
+               AVG(CASE WHEN response_time BETWEEN {qs[RESPONSE_TIME_TRIM]} AND {qs[1 - RESPONSE_TIME_TRIM]}
+                        THEN response_time END) AS media_aparada,
+               SUM(CASE WHEN response_time > {qs[0.75]} + {RESPONSE_TIME_OUTLIER_IQR} * ({qs[0.75]} - {qs[0.25]})
+                        THEN 1 ELSE 0 END) AS atipicas
+        FROM src JOIN q USING (question_id)
+        GROUP BY q.question_id''', start_date, end_date).set_index('question_id')
+    
+    quantiles = pd.DataFrame(result['qs'].tolist(), index=result.index, columns=RESPONSE_TIME_QUANTILES)
+    return response_time_frame(result['n'], result['media'], quantiles, result['media_aparada'], result['atipicas'])
+
+# Versão em cache do resumo por sessão, uma entrada por período, campanha e versão dos dados
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def load_cached_lideranca_scores(start_date, end_date, db_path, data_version):
+    if ANALYTICS_BACKEND == 'duckdb':
+        sessions_df = duckdb_lideranca_sessions(start_date, end_date)
+    else:
+        sessions_df = calculate_lideranca_sessions(load_cached_lideranca_responses(start_date, end_date, db_path,
+                                                                                   data_version))
+    return summarize_lideranca_sessions(sessions_df)
+
+def cached_lideranca_scores(start_date=None, end_date=None):
+    return load_cached_lideranca_scores(start_date, end_date, responses_db_path(),
+                                        get_data_version('lideranca_responses'))
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def load_cached_response_times(start_date, end_date, db_path, data_version):
+    if ANALYTICS_BACKEND == 'duckdb':
+        return duckdb_response_time_stats(start_date, end_date)
+    return calculate_response_time_stats(load_cached_lideranca_responses(start_date, end_date, db_path, data_version))
+
+def cached_response_times(start_date=None, end_date=None):
+    return load_cached_response_times(start_date, end_date, responses_db_path(),
+                                      get_data_version('lideranca_responses'))
+
 # Função para criar visualização de dados HPO nativa do Streamlit
-def display_hpo_stats(stats, performance):
+def display_hpo_stats(stats, performance, dispersion):
     # Criar DataFrame para exibição
     stats_df = pd.DataFrame({
         'Dimensão': list(stats.keys()),
         'Pontuação Média': [f"{v:.2f}/14" for v in stats.values()],
+        'Dispersão': [f"DP {format_stat(d['desvio_padrao'])} · IC 95% {format_interval(d['ic_inferior'], d['ic_superior'])}"
+                      for d in dispersion.values()],
         'Desempenho': list(performance.values())
     })
     
+    st.caption("DP: desvio-padrão dos totais; IC 95%: intervalo de confiança a 95% da pontuação média.")
+    
     # Exibir tabela com formatação condicional
     for idx, row in stats_df.iterrows():
-        col1, col2, col3 = st.columns([4, 2, 2])
+        col1, col2, col3, col4 = st.columns([4, 2, 3, 2])
         with col1:
             st.write(f"**{row['Dimensão']}**")
         with col2:
             st.write(row['Pontuação Média'])
         with col3:
+            st.write(row['Dispersão'])
+        with col4:
             if row['Desempenho'] == "Elevado desempenho":
                 st.markdown(f'<span class="good-performance">{row["Desempenho"]}</span>', unsafe_allow_html=True)
             elif row['Desempenho'] == "Médio":
@@ -600,6 +2719,42 @@ def display_lideranca_stats(question_stats, overall_accuracy):
             st.write(f"Tempo médio de resposta: {stats['tempo_medio']:.1f} segundos")
             st.progress(stats['acuracia'] / 100)
 
+# Função para mostrar a distribuição das pontuações por participante e os percentis do tempo de resposta
+def show_lideranca_scores(start_date=None, end_date=None):
+    scores = cached_lideranca_scores(start_date, end_date)
+    n_questions = len(LIDERANCA_CORRECT_ANSWERS)
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Participantes", scores['sessions'])
+    col2.metric("Pontuação Média", f"{scores['mean_score']:.2f}/{n_questions}")
+    col3.metric(f"Pontuação Máxima ({n_questions}/{n_questions})",
+                f"{scores['histogram'][n_questions] / scores['sessions'] * 100:.1f}%" if scores['sessions'] else "-")
+    
+    st.bar_chart(scores['histogram'].rename_axis('Respostas corretas').rename('Participantes'), height=250)
+    
+    if scores['completion_percentiles']:
+        st.write(f"Tempo total de resposta ({scores['complete']} questionários completos): "
+                 + " · ".join(f"{name}: {value:.1f} s" for name, value in scores['completion_percentiles'].items()))
+
+# Função para mostrar as estatísticas dos tempos de resposta por questão
+def show_response_times(start_date=None, end_date=None):
+    time_stats = cached_response_times(start_date, end_date)
+    if time_stats.empty:
+        st.info("Não existem tempos de resposta registados no período selecionado.")
+        return
+    
+    st.write(f"Tempos em segundos. A média aparada ignora {RESPONSE_TIME_TRIM:.0%} das respostas em cada extremo; "
+             f"são atípicos os tempos acima de Q3 + {RESPONSE_TIME_OUTLIER_IQR} × (Q3 − Q1) da questão.")
+    st.dataframe(pd.DataFrame({
+        'Questão': time_stats.index,
+        'Respostas': time_stats['respostas'].values,
+        **{('Mediana' if pct == 50 else f"p{pct}"): time_stats[f"p{pct}"].round(1).values for pct in TIME_PERCENTILES},
+        'Média aparada': time_stats['media_aparada'].round(1).values,
+        'Média': time_stats['media'].round(1).values,
+        'Limite atípico': time_stats['limite_atipico'].round(1).values,
+        'Atípicos': time_stats['atipicas'].values
+    }), use_container_width=True, hide_index=True)
+
 # Função para criar gráfico de barras HPO usando native Streamlit chart
 def create_hpo_chart(stats):
     chart_data = pd.DataFrame({
@@ -609,23 +2764,207 @@ def create_hpo_chart(stats):
     
     st.bar_chart(chart_data.set_index('Dimensão'), height=400)
 
-# Função para mostrar distribuição de respostas HPO
-def show_hpo_distribution(df):
-    # Remover colunas não numéricas
-    numeric_columns = [col for col in df.columns if col not in ['id', 'timestamp', 'comentario']]
-    all_responses = df[numeric_columns].values.flatten()
-    
-    # Criar DataFrame para o gráfico
-    dist_data = pd.Series(all_responses).value_counts().sort_index()
-    dist_df = pd.DataFrame({
-        'Pontuação': dist_data.index,
-        'Frequência': dist_data.values
-    })
+# Função para calcular a distribuição das pontuações HPO por questão diretamente no SQLite
+@timed
+def load_hpo_distribution(start_date=None, end_date=None):
+    conn = sqlite3.connect(responses_db_path())
+    where, params = period_where(start_date, end_date)
+    
+    # Uma contagem agrupada por questão, unida numa única consulta (resultado com no máximo 14 x 7 linhas)
+    query = ' UNION ALL '.join(
+        f"SELECT '{item}' AS item, {item} AS value, COUNT(*) AS frequency FROM responses{where} GROUP BY {item}"
+        for item in HPO_ITEMS
+    )
+    dist_df = read_sql(query, conn, params=params * len(HPO_ITEMS))
+    conn.close()
+    
+    item_dimension = {item: dim for dim, cols in HPO_DIMENSIONS.items() for item in cols}
+    dist_df['dimension'] = dist_df['item'].map(item_dimension)
+    return dist_df.dropna(subset=['value'])
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def load_cached_hpo_distribution(start_date, end_date, db_path, data_version):
+    if ANALYTICS_BACKEND == 'duckdb':
+        return duckdb_hpo_distribution(start_date, end_date)
+    return load_hpo_distribution(start_date, end_date)
+
+def cached_hpo_distribution(start_date=None, end_date=None):
+    return load_cached_hpo_distribution(start_date, end_date, responses_db_path(), get_data_version('responses'))
+
+# Função para organizar a contagem por opção (formato comum aos dois motores): uma linha por questão,
+# uma coluna por opção e a resposta correta
+def lideranca_option_frame(options_df):
+    options_df = options_df.set_index('question_id')
+    options_df = options_df.reindex([q for q in LIDERANCA_CORRECT_ANSWERS if q in options_df.index])
+    options_df = options_df[LIDERANCA_OPTIONS].fillna(0).astype(int)
+    options_df['correta'] = options_df.index.map(LIDERANCA_CORRECT_ANSWERS)
+    return options_df
+
+# Função para contar as respostas de cada opção por questão numa única consulta agrupada no SQLite,
+# com as opções já em colunas
+@timed
+def load_lideranca_options(start_date=None, end_date=None):
+    conn = sqlite3.connect(responses_db_path())
+    where, params = period_where(start_date, end_date)
+    option_counts = ', '.join(f"SUM(response = '{option}') AS {option}" for option in LIDERANCA_OPTIONS)
+    options_df = read_sql(f"SELECT question_id, {option_counts} FROM lideranca_responses{where} GROUP BY question_id",
+                          conn, params=params)
+    conn.close()
+    return lideranca_option_frame(options_df)
+
+# Função para contar as respostas de cada opção por questão a partir das respostas já carregadas
+# (mesmo formato que load_lideranca_options)
+def calculate_lideranca_options(df):
+    options_df = pd.crosstab(df['question_id'].astype(object), df['response'].astype(object))
+    options_df = options_df.reindex(columns=LIDERANCA_OPTIONS, fill_value=0)
+    return lideranca_option_frame(options_df.rename_axis(index='question_id', columns=None).reset_index())
+
+# Função para contar as respostas de cada opção por questão no DuckDB (mesmo formato que load_lideranca_options)
+@timed
+def duckdb_lideranca_options(start_date=None, end_date=None):
+    option_counts = ', '.join(f"SUM(CASE WHEN response = '{option}' THEN 1 ELSE 0 END) AS {option}"
+                              for option in LIDERANCA_OPTIONS)
+    return lideranca_option_frame(duckdb_query('lideranca_responses',
+                                               f"SELECT question_id, {option_counts} FROM src GROUP BY question_id",
+                                               start_date, end_date))
+
+@st.cache_data(ttl=3600, max_entries=16, show_spinner=False)
+def load_cached_lideranca_options(start_date, end_date, db_path, data_version):
+    if ANALYTICS_BACKEND == 'duckdb':
+        return duckdb_lideranca_options(start_date, end_date)
+    return load_lideranca_options(start_date, end_date)
+
+def cached_lideranca_options(start_date=None, end_date=None):
+    return load_cached_lideranca_options(start_date, end_date, responses_db_path(),
+                                         get_data_version('lideranca_responses'))
+
+# Função para mostrar as respostas por opção de cada questão e a sua evolução
+def show_lideranca_options(start_date=None, end_date=None):
+    options_df = cached_lideranca_options(start_date, end_date)
+    totals = options_df[LIDERANCA_OPTIONS].sum(axis=1)
+    
+    st.dataframe(pd.DataFrame({
+        'Questão': options_df.index,
+        'Resposta correta': options_df['correta'].values,
+        **{f"Opção {option}": options_df[option].values for option in LIDERANCA_OPTIONS},
+        **{f"% {option}": (options_df[option] / totals * 100).round(1).values for option in LIDERANCA_OPTIONS}
+    }), use_container_width=True, hide_index=True)
+    st.bar_chart(options_df[LIDERANCA_OPTIONS].rename_axis('Questão'), height=300)
+    
+    with st.expander(f"Evolução da percentagem de respostas '{LIDERANCA_OPTIONS[0]}'"):
+        granularity = st.radio("Agrupar por:", list(ROLLUP_GRANULARITIES), index=1, horizontal=True,
+                               key="lideranca_option_granularity")
+        trend_df = load_lideranca_option_trend(granularity, start_date, end_date)
+        if trend_df.empty:
+            st.info("Ainda não existem dados de evolução.")
+        else:
+            st.line_chart(trend_df, height=300)
+
+# Função para mostrar distribuição de respostas HPO (geral, por dimensão e por questão)
+def show_hpo_distribution(start_date=None, end_date=None):
+    dist_df = cached_hpo_distribution(start_date, end_date)
     
-    st.bar_chart(dist_df.set_index('Pontuação'), height=300)
+    overall = dist_df.groupby('value')['frequency'].sum().rename_axis('Pontuação').rename('Frequência')
+    st.bar_chart(overall, height=300)
+    
+    with st.expander("Distribuição por dimensão"):
+        by_dimension = dist_df.pivot_table(index='value', columns='dimension', values='frequency',
+                                           aggfunc='sum', fill_value=0).rename_axis(index='Pontuação', columns=None)
+        st.bar_chart(by_dimension, height=350)
+    
+    with st.expander("Distribuição por questão"):
+        by_item = dist_df.pivot_table(index='value', columns='item', values='frequency',
+                                      aggfunc='sum', fill_value=0).rename_axis(index='Pontuação', columns=None)
+        st.dataframe(by_item[[item for item in HPO_ITEMS if item in by_item.columns]], use_container_width=True)
+
+# Função para carregar a evolução das pontuações HPO a partir das tabelas de agregação
+@timed
+def load_hpo_trend(granularity, start_date=None, end_date=None):
+    conn = sqlite3.connect(responses_db_path())
+    where, params = period_where(start_date, end_date, column='bucket')
+    where = where.replace(" WHERE ", " AND ")
+    sum_columns = ', '.join(HPO_ROLLUP_COLUMNS.values())
+    rollup_df = read_sql(f'''SELECT bucket, responses, {sum_columns} FROM hpo_rollup
+                             WHERE granularity = ?{where} ORDER BY bucket''', conn, params=[granularity] + params)
+    conn.close()
+    
+    trend_df = pd.DataFrame(index=rollup_df['bucket'].rename('Período'))
+    for dim, col in HPO_ROLLUP_COLUMNS.items():
+        trend_df[dim] = (rollup_df[col] / rollup_df['responses']).values
+    trend_df['Respostas'] = rollup_df['responses'].values
+    
+    return trend_df
+
+# Função para ler as agregações de Liderança: respostas e respostas corretas por período (linhas) e questão (colunas)
+@timed
+def load_lideranca_rollup(granularity, start_date=None, end_date=None):
+    conn = sqlite3.connect(responses_db_path())
+    where, params = period_where(start_date, end_date, column='bucket')
+    where = where.replace(" WHERE ", " AND ")
+    rollup_df = read_sql(f'''SELECT bucket, question_id, answers, correct FROM lideranca_rollup
+                             WHERE granularity = ?{where} ORDER BY bucket''', conn, params=[granularity] + params)
+    conn.close()
+    
+    answers = rollup_df.pivot(index='bucket', columns='question_id', values='answers').fillna(0)
+    correct = rollup_df.pivot(index='bucket', columns='question_id', values='correct').fillna(0)
+    return answers, correct
+
+# Função para carregar a evolução da taxa de acerto de Liderança a partir das tabelas de agregação
+@timed
+def load_lideranca_trend(granularity, start_date=None, end_date=None):
+    answers, correct = load_lideranca_rollup(granularity, start_date, end_date)
+    
+    trend_df = (correct / answers.where(answers > 0) * 100).rename_axis(index='Período', columns=None)
+    trend_df['Geral'] = correct.sum(axis=1) / answers.sum(axis=1) * 100
+    trend_df['Respostas'] = answers.sum(axis=1)
+    
+    return trend_df
+
+# Função para carregar a evolução da percentagem de respostas na primeira opção ('a') de cada questão.
+# Com duas opções, as respostas 'a' são as corretas nas questões em que 'a' é a resposta certa e as
+# erradas nas restantes, pelo que as tabelas de agregação bastam
+@timed
+def load_lideranca_option_trend(granularity, start_date=None, end_date=None):
+    answers, correct = load_lideranca_rollup(granularity, start_date, end_date)
+    
+    first_option = answers - correct
+    first_is_correct = [q for q in correct.columns if LIDERANCA_CORRECT_ANSWERS.get(q) == LIDERANCA_OPTIONS[0]]
+    first_option[first_is_correct] = correct[first_is_correct]
+    
+    return (first_option / answers.where(answers > 0) * 100).rename_axis(index='Período', columns=None)
+
+# Função para mostrar a evolução das pontuações HPO ao longo do tempo
+def show_hpo_trend(start_date=None, end_date=None):
+    granularity = st.radio("Agrupar por:", list(ROLLUP_GRANULARITIES), index=1, horizontal=True, key="hpo_trend_granularity")
+    trend_df = load_hpo_trend(granularity, start_date, end_date)
+    
+    if trend_df.empty:
+        st.info("Ainda não existem dados de evolução.")
+        return
+    
+    st.line_chart(trend_df[list(HPO_DIMENSIONS)], height=350)
+    st.write("Número de respostas por período")
+    st.bar_chart(trend_df['Respostas'], height=200)
+
+# Função para mostrar a evolução da taxa de acerto de Liderança ao longo do tempo
+def show_lideranca_trend(start_date=None, end_date=None):
+    granularity = st.radio("Agrupar por:", list(ROLLUP_GRANULARITIES), index=1, horizontal=True, key="lideranca_trend_granularity")
+    trend_df = load_lideranca_trend(granularity, start_date, end_date)
+    
+    if trend_df.empty:
+        st.info("Ainda não existem dados de evolução.")
+        return
+    
+    st.line_chart(trend_df.drop(columns=['Respostas']), height=350)
+    st.write("Número de respostas por período")
+    st.bar_chart(trend_df['Respostas'], height=200)
 
 # Função para gerar relatório HPO em HTML simplificado
-def generate_hpo_html_report(stats, performance, overall_performance, df):
+@timed
+def generate_hpo_html_report(stats, performance, overall_performance, df, dispersion=None):
+    if dispersion is None:
+        dispersion = calculate_hpo_stats(df)[3]
+    
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -669,6 +3008,9 @@ def generate_hpo_html_report(stats, performance, overall_performance, df):
             <tr>
                 <th>Dimensão</th>
                 <th>Pontuação Média</th>
+                <th>Desvio-Padrão</th>
+                <th>Erro-Padrão</th>
+                <th>IC 95%</th>
                 <th>Desempenho</th>
             </tr>
     """
@@ -686,6 +3028,9 @@ def generate_hpo_html_report(stats, performance, overall_performance, df):
             <tr>
                 <td>{dim}</td>
                 <td>{avg_total:.2f}/14</td>
+                <td>{format_stat(dispersion[dim]['desvio_padrao'])}</td>
+                <td>{format_stat(dispersion[dim]['erro_padrao'], 3)}</td>
+                <td>{format_interval(dispersion[dim]['ic_inferior'], dispersion[dim]['ic_superior'], " – ")}</td>
                 <td class="{perf_class}">{performance[dim]}</td>
             </tr>
         """
@@ -742,7 +3087,13 @@ def generate_hpo_html_report(stats, performance, overall_performance, df):
     return html_content.encode('utf-8')
 
 # Função para gerar relatório de Liderança em HTML (modificada)
-def generate_lideranca_html_report(question_stats, overall_accuracy, df):
+@timed
+def generate_lideranca_html_report(question_stats, overall_accuracy, df, time_stats=None, option_stats=None):
+    if time_stats is None:
+        time_stats = calculate_response_time_stats(df)
+    if option_stats is None:
+        option_stats = calculate_lideranca_options(df)
+    
     html_content = f"""
     <!DOCTYPE html>
     <html>
@@ -814,6 +3165,76 @@ def generate_lideranca_html_report(question_stats, overall_accuracy, df):
         </table>
     """
     
+    # Respostas por opção de cada questão
+    html_content += """
+        <h2>Respostas por Opção</h2>
+        <table>
+            <tr>
+                <th>Questão</th>
+                <th>Resposta Correta</th>
+    """
+    for option in LIDERANCA_OPTIONS:
+        html_content += f"""
+                <th>Opção {option}</th>
+        """
+    html_content += """
+            </tr>
+    """
+    
+    for q, row in option_stats.iterrows():
+        total = sum(row[option] for option in LIDERANCA_OPTIONS)
+        html_content += f"""
+            <tr>
+                <td>{question_texts.get(q, q)}</td>
+                <td>{row['correta']}</td>
+        """
+        for option in LIDERANCA_OPTIONS:
+            html_content += f"""
+                <td>{row[option]} ({row[option] / total * 100 if total else 0:.1f}%)</td>
+            """
+        html_content += """
+            </tr>
+        """
+    
+    html_content += """
+        </table>
+    """
+    
+    # Tempos de resposta por questão (mediana e percentis)
+    if not time_stats.empty:
+        html_content += f"""
+        <h2>Tempos de Resposta (segundos)</h2>
+        <p>A média aparada ignora {RESPONSE_TIME_TRIM:.0%} das respostas em cada extremo; são atípicos os tempos
+        acima de Q3 + {RESPONSE_TIME_OUTLIER_IQR} × (Q3 − Q1) da questão.</p>
+        <table>
+            <tr>
+                <th>Questão</th>
+                <th>Mediana</th>
+                <th>p90</th>
+                <th>p99</th>
+                <th>Média Aparada</th>
+                <th>Média</th>
+                <th>Respostas Atípicas</th>
+            </tr>
+        """
+        
+        for q, row in time_stats.iterrows():
+            html_content += f"""
+            <tr>
+                <td>{question_texts.get(q, q)}</td>
+                <td>{row['p50']:.1f}</td>
+                <td>{row['p90']:.1f}</td>
+                <td>{row['p99']:.1f}</td>
+                <td>{row['media_aparada']:.1f}</td>
+                <td>{row['media']:.1f}</td>
+                <td>{int(row['atipicas'])}/{int(row['respostas'])}</td>
+            </tr>
+            """
+        
+        html_content += """
+        </table>
+        """
+    
     html_content += f"""
         <h2>Informações Adicionais</h2>
         <p><strong>Total de sessões completadas:</strong> {df['session_id'].nunique()}</p>
@@ -907,10 +3328,15 @@ def survey_hpo_page():
         if st.button("Preencher novo questionário"):
             st.session_state.submitted = False
             st.session_state.form_type = None
+            st.session_state.pop('hpo_submission_token', None)
             st.rerun()
             
         return
     
+    # Identificador desta submissão: uma segunda execução do envio (duplo clique, reconexão) não duplica a resposta
+    if 'hpo_submission_token' not in st.session_state:
+        st.session_state.hpo_submission_token = str(uuid.uuid4())
+    
     with st.form("survey_form"):
         # Agrupar questões por dimensão para melhor organização
         dimensions = [
@@ -988,7 +3414,7 @@ def survey_hpo_page():
         submitted = st.form_submit_button("Submeter Questionário", use_container_width=True)
         
         if submitted:
-            save_hpo_response(responses, comentario)
+            record_hpo_submission(responses, comentario, st.session_state.hpo_submission_token)
             st.session_state.submitted = True
             st.rerun()
 
@@ -1006,6 +3432,7 @@ def survey_lideranca_page():
         st.session_state.lideranca_session_id = str(uuid.uuid4())
         st.session_state.lideranca_current_question = 0
         st.session_state.lideranca_responses = []
+        st.session_state.lideranca_answered_at = []
         st.session_state.lideranca_start_time = time.time()
         st.session_state.lideranca_completed = False
     
@@ -1022,6 +3449,7 @@ def survey_lideranca_page():
             st.session_state.lideranca_session_id = str(uuid.uuid4())
             st.session_state.lideranca_current_question = 0
             st.session_state.lideranca_responses = []
+            st.session_state.lideranca_answered_at = []
             st.session_state.lideranca_start_time = time.time()
             st.session_state.lideranca_completed = False
             st.session_state.form_type = None
@@ -1105,17 +3533,21 @@ def survey_lideranca_page():
                 # Calcular tempo de resposta
                 response_time = time.time() - st.session_state.lideranca_start_time
                 
-                # Armazenar resposta
+                # Armazenar resposta (um envio repetido da mesma pergunta substitui a anterior)
+                del st.session_state.lideranca_responses[current_question_idx:]
+                del st.session_state.lideranca_answered_at[current_question_idx:]
                 st.session_state.lideranca_responses.append(
                     (f"q{current_question_idx + 1}", response, response_time)
                 )
+                st.session_state.lideranca_answered_at.append(datetime.now().isoformat())
                 
                 # Verificar se é a última pergunta
                 if current_question_idx + 1 >= len(questions):
                     # Salvar todas as respostas
-                    save_lideranca_response(
+                    record_lideranca_submission(
                         st.session_state.lideranca_session_id,
-                        st.session_state.lideranca_responses
+                        st.session_state.lideranca_responses,
+                        st.session_state.lideranca_answered_at
                     )
                     st.session_state.lideranca_completed = True
                 else:
@@ -1125,78 +3557,136 @@ def survey_lideranca_page():
                 
                 st.rerun()
 
+# Função para mostrar o filtro de período e devolver as datas selecionadas (None quando não há filtro)
+def period_filter(key):
+    selected = st.date_input("Período das respostas (deixe vazio para considerar todas)",
+                             value=(), format="DD/MM/YYYY", key=key)
+    
+    if len(selected) == 2:
+        return selected[0], selected[1]
+    if len(selected) == 1:
+        # Apenas a data inicial foi escolhida até agora
+        return selected[0], selected[0]
+    return None, None
+
+# Separador de estatísticas HPO (comum aos painéis de gestão e administração)
+def hpo_stats_tab():
+    st.subheader("Estatísticas das Respostas - Protocolo HPO")
+    st.info("""
+    **Protocolo de Pontuação:**
+    - Pontuação 12 - 14 = Elevado desempenho
+    - Pontuação 9 - 11 = Médio
+    - Pontuação igual ou inferior a 8 = Oportunidade de melhoria
+    """)
+    
+    start_date, end_date = period_filter("hpo_period")
+    df = cached_hpo_responses(start_date, end_date)
+    
+    if not df.empty:
+        stats, performance, overall_performance, dispersion = analytics_hpo_stats(df, start_date, end_date)
+        
+        # Gráfico de barras nativo do Streamlit
+        st.subheader("Desempenho por Dimensão")
+        create_hpo_chart(stats)
+        
+        # Tabela de pontuações e desempenho
+        st.subheader("Pontuações e Desempenho por Dimensão")
+        display_hpo_stats(stats, performance, dispersion)
+        
+        # Desempenho geral
+        st.subheader("Desempenho Geral da Organização")
+        st.metric("Classificação Geral", overall_performance)
+        
+        # Evolução temporal (lida apenas das tabelas de agregação)
+        st.subheader("Evolução das Pontuações por Dimensão")
+        show_hpo_trend(start_date, end_date)
+        
+        # Distribuição das respostas
+        st.subheader("Distribuição das Respostas Individuais")
+        show_hpo_distribution(start_date, end_date)
+        
+        # Comentários
+        if 'comentario' in df.columns:
+            comentarios_df = df[df['comentario'].notna() & (df['comentario'] != '')]
+            if not comentarios_df.empty:
+                st.subheader("Comentários dos Participantes")
+                for idx, row in comentarios_df.iterrows():
+                    with st.expander(f"Comentário de {row['timestamp']}"):
+                        st.markdown(f'<div class="comment-box">{row["comentario"]}</div>', unsafe_allow_html=True)
+        else:
+            st.info("Coluna de comentários não disponível no banco de dados.")
+        
+    else:
+        st.info("Não existem respostas HPO para analisar no período selecionado.")
+
+# Separador de estatísticas de Liderança (comum aos painéis de gestão e administração)
+def lideranca_stats_tab():
+    st.subheader("Estatísticas das Respostas - Questionário de Liderança")
+    
+    start_date, end_date = period_filter("lideranca_period")
+    df = cached_lideranca_responses(start_date, end_date)
+    
+    if not df.empty:
+        question_stats, overall_accuracy = analytics_lideranca_stats(df, start_date, end_date)
+        
+        st.subheader("Desempenho Geral")
+        display_lideranca_stats(question_stats, overall_accuracy)
+        
+        # Pontuação de cada participante (respostas corretas em 6)
+        st.subheader("Pontuação por Participante")
+        show_lideranca_scores(start_date, end_date)
+        
+        # Tempos de resposta (mediana e percentis, pouco sensíveis a respostas deixadas em aberto)
+        st.subheader("Tempos de Resposta")
+        show_response_times(start_date, end_date)
+        
+        # Divisão das respostas entre as opções de cada questão
+        st.subheader("Respostas por Opção")
+        show_lideranca_options(start_date, end_date)
+        
+        # Evolução temporal (lida apenas das tabelas de agregação)
+        st.subheader("Evolução da Taxa de Acerto")
+        show_lideranca_trend(start_date, end_date)
+        
+        # Comentários
+        if 'comentario' in df.columns:
+            comentarios_df = df[df['comentario'].notna() & (df['comentario'] != '')]
+            if not comentarios_df.empty:
+                st.subheader("Comentários dos Participantes")
+                for idx, row in comentarios_df.iterrows():
+                    with st.expander(f"Comentário de {row['timestamp']}"):
+                        st.markdown(f'<div class="comment-box">{row["comentario"]}</div>', unsafe_allow_html=True)
+        
+    else:
+        st.info("Não existem respostas de Liderança para analisar no período selecionado.")
+
+# Função para escolher, na barra lateral, a campanha analisada nos painéis (por omissão a ativa)
+def campaign_selector():
+    campaigns = get_campaigns()
+    active = next((campaign for campaign in campaigns if campaign[4]), campaigns[0])
+    if len(campaigns) < 2:
+        return active
+    
+    # Os nomes das campanhas são únicos
+    by_name = {campaign[1]: campaign for campaign in campaigns}
+    name = st.sidebar.selectbox("Campanha", list(by_name), index=campaigns.index(active), key="campaign_selector")
+    campaign = by_name[name]
+    st.sidebar.caption(f"Campanha ativa: {active[1]}")
+    select_campaign(campaign_db_path(campaign[2]))
+    return campaign
+
 # Página de gestão para gestores
 def manager_page():
     st.title("Painel de Gestão")
+    campaign_selector()
     
     tab1, tab2, tab3 = st.tabs(["Estatísticas HPO", "Estatísticas Liderança", "Relatórios"])
     
     with tab1:
-        st.subheader("Estatísticas das Respostas - Protocolo HPO")
-        st.info("""
-        **Protocolo de Pontuação:**
-        - Pontuação 12 - 14 = Elevado desempenho
-        - Pontuação 9 - 11 = Médio
-        - Pontuação igual ou inferior a 8 = Oportunidade de melhoria
-        """)
-        
-        df = load_hpo_responses()
-        
-        if not df.empty:
-            stats, performance, overall_performance, _ = calculate_hpo_stats(df)
-            
-            # Gráfico de barras nativo do Streamlit
-            st.subheader("Desempenho por Dimensão")
-            create_hpo_chart(stats)
-            
-            # Tabela de pontuações e desempenho
-            st.subheader("Pontuações e Desempenho por Dimensão")
-            display_hpo_stats(stats, performance)
-            
-            # Desempenho geral
-            st.subheader("Desempenho Geral da Organização")
-            st.metric("Classificação Geral", overall_performance)
-            
-            # Distribuição das respostas
-            st.subheader("Distribuição das Respostas Individuais")
-            show_hpo_distribution(df)
-            
-            # Comentários
-            if 'comentario' in df.columns:
-                comentarios_df = df[df['comentario'].notna() & (df['comentario'] != '')]
-                if not comentarios_df.empty:
-                    st.subheader("Comentários dos Participantes")
-                    for idx, row in comentarios_df.iterrows():
-                        with st.expander(f"Comentário de {row['timestamp']}"):
-                            st.markdown(f'<div class="comment-box">{row["comentario"]}</div>', unsafe_allow_html=True)
-            else:
-                st.info("Coluna de comentários não disponível no banco de dados.")
-            
-        else:
-            st.info("Ainda não existem respostas HPO para analisar.")
+        hpo_stats_tab()
     
     with tab2:
-        st.subheader("Estatísticas das Respostas - Questionário de Liderança")
-        
-        df = load_lideranca_responses()
-        
-        if not df.empty:
-            question_stats, overall_accuracy = calculate_lideranca_stats(df)
-            
-            st.subheader("Desempenho Geral")
-            display_lideranca_stats(question_stats, overall_accuracy)
-            
-            # Comentários
-            if 'comentario' in df.columns:
-                comentarios_df = df[df['comentario'].notna() & (df['comentario'] != '')]
-                if not comentarios_df.empty:
-                    st.subheader("Comentários dos Participantes")
-                    for idx, row in comentarios_df.iterrows():
-                        with st.expander(f"Comentário de {row['timestamp']}"):
-                            st.markdown(f'<div class="comment-box">{row["comentario"]}</div>', unsafe_allow_html=True)
-            
-        else:
-            st.info("Ainda não existem respostas de Liderança para analisar.")
+        lideranca_stats_tab()
     
     with tab3:
         st.subheader("Relatórios de Análise")
@@ -1205,18 +3695,20 @@ def manager_page():
                               ["HPO", "Liderança"],
                               horizontal=True)
         
+        start_date, end_date = period_filter("report_period")
+        
         if report_type == "HPO":
-            df = load_hpo_responses()
+            df = cached_hpo_responses(start_date, end_date)
             
             if not df.empty:
-                stats, performance, overall_performance, _ = calculate_hpo_stats(df)
+                stats, performance, overall_performance, dispersion = analytics_hpo_stats(df, start_date, end_date)
                 
                 st.info("Gere relatórios detalhados com a análise completa dos dados do inquérito HPO.")
                 
                 st.subheader("Relatório em HTML")
                 st.write("Relatório completo em formato HTML para visualização no navegador.")
                 
-                html_report = generate_hpo_html_report(stats, performance, overall_performance, df)
+                html_report = generate_hpo_html_report(stats, performance, overall_performance, df, dispersion)
                 
                 st.download_button(
                     label="Descarregar Relatório HPO",
@@ -1254,20 +3746,22 @@ def manager_page():
                         st.markdown(f"- **{dim}**: {avg_total:.2f}/14 - <span class='{perf_class}'>{performance[dim]}</span>", unsafe_allow_html=True)
             
             else:
-                st.info("Ainda não existem respostas HPO para gerar relatórios.")
+                st.info("Não existem respostas HPO para gerar relatórios no período selecionado.")
         
         else:  # Liderança
-            df = load_lideranca_responses()
+            df = cached_lideranca_responses(start_date, end_date)
             
             if not df.empty:
-                question_stats, overall_accuracy = calculate_lideranca_stats(df)
+                question_stats, overall_accuracy = analytics_lideranca_stats(df, start_date, end_date)
                 
                 st.info("Gere relatórios detalhados com a análise completa dos dados do inquérito de Liderança.")
                 
                 st.subheader("Relatório em HTML")
                 st.write("Relatório completo em formato HTML para visualização no navegador.")
                 
-                html_report = generate_lideranca_html_report(question_stats, overall_accuracy, df)
+                html_report = generate_lideranca_html_report(question_stats, overall_accuracy, df,
+                                                             cached_response_times(start_date, end_date),
+                                                             cached_lideranca_options(start_date, end_date))
                 
                 st.download_button(
                     label="Descarregar Relatório de Liderança",
@@ -1297,11 +3791,12 @@ def manager_page():
                         st.markdown(f"- **Questão {q}**: {stats['corretas']}/{stats['total']} ({stats['acuracia']:.1f}%)")
             
             else:
-                st.info("Ainda não existem respostas de Liderança para gerar relatórios.")
+                st.info("Não existem respostas de Liderança para gerar relatórios no período selecionado.")
 
 # Página de administração
 def admin_page():
     st.title("Painel de Administração")
+    campaign = campaign_selector()
     
     # Inicializar estados da sessão se não existirem
     if 'refresh_needed' not in st.session_state:
@@ -1447,71 +3942,10 @@ def admin_page():
             st.rerun()
     
     with tab2:
-        st.subheader("Estatísticas das Respostas - Protocolo HPO")
-        st.info("""
-        **Protocolo de Pontuação:**
-        - Pontuação 12 - 14 = Elevado desempenho
-        - Pontuação 9 - 11 = Médio
-        - Pontuação igual ou inferior a 8 = Oportunidade de melhoria
-        """)
-        
-        df = load_hpo_responses()
-        
-        if not df.empty:
-            stats, performance, overall_performance, _ = calculate_hpo_stats(df)
-            
-            # Gráfico de barras nativo do Streamlit
-            st.subheader("Desempenho por Dimensão")
-            create_hpo_chart(stats)
-            
-            # Tabela de pontuações e desempenho
-            st.subheader("Pontuações e Desempenho por Dimensão")
-            display_hpo_stats(stats, performance)
-            
-            # Desempenho geral
-            st.subheader("Desempenho Geral da Organização")
-            st.metric("Classificação Geral", overall_performance)
-            
-            # Distribuição das respostas
-            st.subheader("Distribuição das Respostas Individuais")
-            show_hpo_distribution(df)
-            
-            # Comentários
-            if 'comentario' in df.columns:
-                comentarios_df = df[df['comentario'].notna() & (df['comentario'] != '')]
-                if not comentarios_df.empty:
-                    st.subheader("Comentários dos Participantes")
-                    for idx, row in comentarios_df.iterrows():
-                        with st.expander(f"Comentário de {row['timestamp']}"):
-                            st.markdown(f'<div class="comment-box">{row["comentario"]}</div>', unsafe_allow_html=True)
-            else:
-                st.info("Coluna de comentários não disponível no banco de dados.")
-            
-        else:
-            st.info("Ainda não existem respostas HPO para analisar.")
+        hpo_stats_tab()
     
     with tab3:
-        st.subheader("Estatísticas das Respostas - Questionário de Liderança")
-        
-        df = load_lideranca_responses()
-        
-        if not df.empty:
-            question_stats, overall_accuracy = calculate_lideranca_stats(df)
-            
-            st.subheader("Desempenho Geral")
-            display_lideranca_stats(question_stats, overall_accuracy)
-            
-            # Comentários
-            if 'comentario' in df.columns:
-                comentarios_df = df[df['comentario'].notna() & (df['comentario'] != '')]
-                if not comentarios_df.empty:
-                    st.subheader("Comentários dos Participantes")
-                    for idx, row in comentarios_df.iterrows():
-                        with st.expander(f"Comentário de {row['timestamp']}"):
-                            st.markdown(f'<div class="comment-box">{row["comentario"]}</div>', unsafe_allow_html=True)
-            
-        else:
-            st.info("Ainda não existem respostas de Liderança para analisar.")
+        lideranca_stats_tab()
     
     with tab4:
         st.subheader("Relatórios de Análise")
@@ -1520,11 +3954,13 @@ def admin_page():
                               ["HPO", "Liderança"],
                               horizontal=True)
         
+        start_date, end_date = period_filter("report_period")
+        
         if report_type == "HPO":
-            df = load_hpo_responses()
+            df = cached_hpo_responses(start_date, end_date)
             
             if not df.empty:
-                stats, performance, overall_performance, _ = calculate_hpo_stats(df)
+                stats, performance, overall_performance, dispersion = analytics_hpo_stats(df, start_date, end_date)
                 
                 st.info("Gere relatórios detalhados com a análise completa dos dados do inquérito HPO.")
                 
@@ -1534,7 +3970,7 @@ def admin_page():
                     st.subheader("Relatório em HTML")
                     st.write("Relatório completo em formato HTML para visualização no navegador.")
                     
-                    html_report = generate_hpo_html_report(stats, performance, overall_performance, df)
+                    html_report = generate_hpo_html_report(stats, performance, overall_performance, df, dispersion)
                     
                     st.download_button(
                         label="Descarregar Relatório HPO",
@@ -1585,13 +4021,13 @@ def admin_page():
                         st.markdown(f"- **{dim}**: {avg_total:.2f}/14 - <span class='{perf_class}'>{performance[dim]}</span>", unsafe_allow_html=True)
             
             else:
-                st.info("Ainda não existem respostas HPO para gerar relatórios.")
+                st.info("Não existem respostas HPO para gerar relatórios no período selecionado.")
         
         else:  # Liderança
-            df = load_lideranca_responses()
+            df = cached_lideranca_responses(start_date, end_date)
             
             if not df.empty:
-                question_stats, overall_accuracy = calculate_lideranca_stats(df)
+                question_stats, overall_accuracy = analytics_lideranca_stats(df, start_date, end_date)
                 
                 st.info("Gere relatórios detalhados com a análise completa dos dados do inquérito de Liderança.")
                 
@@ -1601,7 +4037,9 @@ def admin_page():
                     st.subheader("Relatório em HTML")
                     st.write("Relatório completo em formato HTML para visualização no navegador.")
                     
-                    html_report = generate_lideranca_html_report(question_stats, overall_accuracy, df)
+                    html_report = generate_lideranca_html_report(question_stats, overall_accuracy, df,
+                                                                 cached_response_times(start_date, end_date),
+                                                                 cached_lideranca_options(start_date, end_date))
                     
                     st.download_button(
                         label="Descarregar Relatório de Liderança",
@@ -1644,7 +4082,7 @@ def admin_page():
                         st.markdown(f"- **Questão {q}**: {stats['corretas']}/{stats['total']} ({stats['acuracia']:.1f}%)")
             
             else:
-                st.info("Ainda não existem respostas de Liderança para gerar relatórios.")
+                st.info("Não existem respostas de Liderança para gerar relatórios no período selecionado.")
     
     with tab5:
         st.subheader("Manutenção do Sistema")
@@ -1655,8 +4093,10 @@ def admin_page():
         
         with col1:
             st.info("**Reset Completo do Sistema**")
-            st.write("Esta operação irá apagar permanentemente TODAS as respostas dos questionários e reiniciar o sistema.")
-            st.error("**ATENÇÃO:** Esta ação não pode ser desfeita!")
+            st.write("Esta operação recomeça a campanha sem respostas. As respostas atuais ficam guardadas numa "
+                     "campanha fechada, que pode ser consultada no seletor de campanhas.")
+            st.write(f"Campanha: **{campaign[1]}**")
+            st.error("**ATENÇÃO:** A campanha deixa de mostrar as respostas atuais!")
             
             # Usar uma variável de sessão para controlar o estado de confirmação
             if 'reset_confirmed' not in st.session_state:
@@ -1669,15 +4109,15 @@ def admin_page():
                     st.rerun()
             else:
                 # Segunda etapa - confirmações finais
-                st.warning("Tem a certeza absoluta que deseja apagar TODOS os dados?")
-                confirm1 = st.checkbox("Confirmo que compreendo que todos os dados serão PERDIDOS")
+                st.warning("Tem a certeza absoluta que deseja recomeçar a campanha sem respostas?")
+                confirm1 = st.checkbox("Confirmo que compreendo que a campanha vai recomeçar sem respostas")
                 confirm2 = st.checkbox("Confirmo que desejo prosseguir com o reset completo")
                 
                 col1, col2 = st.columns(2)
                 with col1:
                     if st.button("✅ Confirmar Reset", key="confirm_reset", use_container_width=True, disabled=not (confirm1 and confirm2)):
-                        if reset_entire_system():
-                            st.success("Sistema resetado com sucesso! Todos os dados foram apagados.")
+                        if reset_entire_system(campaign[0]):
+                            st.success("Sistema resetado com sucesso! As respostas anteriores foram guardadas numa campanha fechada.")
                             st.session_state.reset_confirmed = False
                             st.rerun()
                         else:
@@ -1690,22 +4130,235 @@ def admin_page():
         
         with col2:
             st.info("**Estatísticas do Banco de Dados**")
-            hpo_df = load_hpo_responses()
-            lideranca_df = load_lideranca_responses()
+            db_path = responses_db_path()
+            health = database_health(db_path)
+            hpo_health = health['tables']['responses']
+            lideranca_health = health['tables']['lideranca_responses']
+            
+            st.write(f"Total de respostas HPO: {hpo_health['rows']}")
+            st.write(f"Total de respostas Liderança: {lideranca_health['rows']}")
+            
+            if hpo_health['rows']:
+                st.write(f"Primeira resposta HPO: {hpo_health['first']}")
+                st.write(f"Última resposta HPO: {hpo_health['last']}")
+            
+            if lideranca_health['rows']:
+                st.write(f"Primeira resposta Liderança: {lideranca_health['first']}")
+                st.write(f"Última resposta Liderança: {lideranca_health['last']}")
+            
+            st.write(f"Ficheiro: {os.path.basename(db_path)} · {health['size_mb']:.2f} MB (WAL: {health['wal_mb']:.2f} MB)")
+            st.write(f"Páginas livres: {health['freelist_count']} de {health['page_count']} "
+                     f"({health['fragmentation']:.1f}%) · auto_vacuum: {health['auto_vacuum']}")
+            st.write(f"Crescimento (últimos {HEALTH_GROWTH_DAYS} dias): {health['rows_per_day']:.1f} linhas/dia "
+                     f"(≈ {health['growth_mb_per_day']:.2f} MB/dia)")
+            
+            with st.expander("Índices"):
+                for table, table_health in health['tables'].items():
+                    st.write(f"**{table}**: " + ", ".join(f"{name}{' (único)' if unique else ''}"
+                                                           for name, unique in table_health['indexes']))
+                
+                # O tamanho de cada índice obriga a percorrer todas as páginas: só é medido a pedido
+                if st.button("Medir tamanho das tabelas e índices", key="measure_object_sizes"):
+                    sizes_df = database_object_sizes(db_path)
+                    if sizes_df is None:
+                        st.warning("Esta versão do SQLite não inclui a tabela dbstat.")
+                    else:
+                        st.dataframe(sizes_df, use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        st.subheader("Campanhas")
+        st.write("Cada campanha guarda as respostas no seu próprio ficheiro. As novas respostas são gravadas na "
+                 "campanha ativa; os painéis mostram a campanha escolhida na barra lateral.")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            with st.form("create_campaign_form"):
+                campaign_name = st.text_input("Nome da nova campanha")
+                activate_new = st.checkbox("Tornar a nova campanha ativa", value=True)
+                
+                if st.form_submit_button("Criar Campanha", use_container_width=True):
+                    if not campaign_name.strip():
+                        st.error("Indique o nome da campanha.")
+                    elif create_campaign(campaign_name.strip(), activate_new):
+                        st.success(f"Campanha '{campaign_name.strip()}' criada com sucesso!")
+                    else:
+                        st.error("Erro ao criar a campanha. O nome pode já existir.")
+        
+        with col2:
+            campaign_ids = {name: campaign_id for campaign_id, name, _, _, _ in get_campaigns()}
+            to_activate = st.selectbox("Campanha ativa", list(campaign_ids), key="campaign_to_activate",
+                                       index=list(campaign_ids).index(active_campaign()[1]))
+            
+            if st.button("Ativar Campanha", key="activate_campaign", use_container_width=True):
+                activate_campaign(campaign_ids[to_activate])
+                st.success(f"As novas respostas passam a ser gravadas em '{to_activate}'.")
+        
+        st.dataframe(campaign_overview(), use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        st.subheader("Arquivo e Compactação")
+        st.write("Move as respostas anteriores ao período de retenção da campanha escolhida para um arquivo comprimido "
+                 "e compacta a base de dados. As agregações temporais mantêm-se, pelo que a evolução continua completa.")
+        
+        retention_days = st.number_input("Manter as respostas dos últimos (dias)", min_value=1,
+                                         value=ARCHIVE_RETENTION_DAYS, step=30, key="archive_retention_days")
+        
+        if st.button("Arquivar e Compactar", key="archive_responses"):
+            result = archive_responses(int(retention_days))
+            
+            if result['archive']:
+                st.success(f"Arquivadas {result['hpo']} respostas HPO e {result['lideranca']} sessões de Liderança "
+                           f"anteriores a {result['cutoff']} em {result['archive']}.")
+            else:
+                st.info(f"Não existem respostas anteriores a {result['cutoff']}; a base de dados foi apenas compactada.")
+            
+            labels = {'size_mb': "Tamanho (MB)", 'page_count': "Páginas", 'freelist_count': "Páginas livres",
+                      'fragmentation': "Fragmentação (%)", 'auto_vacuum': "auto_vacuum"}
+            formats = {'size_mb': "{:.2f}", 'fragmentation': "{:.1f}"}
+            st.dataframe(pd.DataFrame({
+                'Medida': list(labels.values()),
+                'Antes': [formats.get(key, "{}").format(result['before'][key]) for key in labels],
+                'Depois': [formats.get(key, "{}").format(result['after'][key]) for key in labels]
+            }), use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        st.subheader("Cópias de Segurança")
+        st.write("As cópias são feitas em segundo plano, sem interromper as submissões, e incluem a base de dados "
+                 f"principal e todas as campanhas. Mantêm-se as {BACKUP_KEEP} cópias mais recentes"
+                 + (f"; é feita uma cópia automática a cada {BACKUP_INTERVAL_HOURS:g} horas." if BACKUP_INTERVAL_HOURS > 0 else "."))
+        
+        backup_state = get_backup_state()
+        if st.button("💾 Criar Cópia de Segurança", key="start_backup"):
+            if start_backup(backup_state):
+                st.info("Cópia de segurança iniciada em segundo plano.")
+        
+        if backup_state['lock'].locked():
+            st.info("Cópia de segurança em curso...")
+        if backup_state['error']:
+            st.error(f"Erro na última cópia de segurança: {backup_state['error']}")
+        
+        backups = list_backups()
+        if not backups:
+            st.info("Ainda não existem cópias de segurança.")
+        else:
+            st.dataframe(pd.DataFrame([{
+                'Cópia': backup['name'],
+                'Criada em': backup['created_at'],
+                'Motivo': backup['reason'],
+                'Ficheiros': len(backup['files']),
+                'Tamanho (MB)': round(sum(entry['size_mb'] for entry in backup['files']), 2),
+                'Duração (s)': round(sum(entry['seconds'] for entry in backup['files']), 2),
+                'Integridade': "ok" if backup['ok'] else "; ".join(entry['integrity'] for entry in backup['files']
+                                                                   if entry['integrity'] != "ok")
+            } for backup in backups]), use_container_width=True, hide_index=True)
+            
+            restore_name = st.selectbox("Cópia a restaurar", [backup['name'] for backup in backups if backup['ok']],
+                                        key="restore_backup_name")
+            confirm_restore = st.checkbox("Confirmo que os dados atuais serão substituídos pelos da cópia "
+                                          "(é guardada antes uma cópia do estado atual)", key="confirm_restore")
+            
+            if st.button("♻️ Restaurar Cópia", key="restore_backup", disabled=not (confirm_restore and restore_name)):
+                try:
+                    restore_backup(restore_name)
+                    st.success(f"Cópia {restore_name} restaurada com sucesso!")
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    st.error(f"Erro ao restaurar a cópia: {e}")
+        
+        st.markdown("---")
+        st.subheader("Tarefas Agendadas")
+        if not SCHEDULER_ENABLED:
+            st.warning("O agendador está desativado (HPO_SCHEDULER=0).")
+        else:
+            scheduler_state = get_scheduler_state()
+            leader = scheduler_leader()
+            st.write(f"As tarefas são executadas em segundo plano por um único processo (verificação a cada "
+                     f"{SCHEDULER_TICK_SECONDS} segundos). Processo líder: {leader or 'nenhum'}"
+                     + (" (este processo)" if scheduler_state['leader'] and leader == scheduler_state['owner'] else ""))
+        
+        st.dataframe(scheduler_job_summary(), use_container_width=True, hide_index=True)
+        
+        job_name = st.selectbox("Tarefa", list(SCHEDULED_JOBS), key="scheduler_job")
+        if st.button("▶️ Executar Agora", key="run_scheduler_job", disabled=not job_name):
+            with st.spinner(f"A executar a tarefa {job_name}..."):
+                if run_job(job_name, get_scheduler_state()):
+                    st.success(f"Tarefa {job_name} executada.")
+                else:
+                    st.warning(f"A tarefa {job_name} já está em curso.")
+        
+        with st.expander("Histórico das execuções"):
+            st.dataframe(scheduler_history(), use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        st.subheader("Desempenho")
+        st.write("Tempos de execução das funções de base de dados, cálculo de estatísticas, relatórios e páginas, "
+                 f"medidos neste processo (últimas {PERF_WINDOW} chamadas por função).")
+        
+        if st.button("Limpar métricas de desempenho", key="reset_perf"):
+            reset_perf_registry()
+        
+        summary_df, slowest_df = get_perf_summary()
+        
+        if summary_df.empty:
+            st.info("Ainda não existem medições de desempenho.")
+        else:
+            st.dataframe(summary_df.style.format(precision=2), use_container_width=True, hide_index=True)
             
-            st.write(f"Total de respostas HPO: {len(hpo_df)}")
-            st.write(f"Total de respostas Liderança: {len(lideranca_df)}")
+            st.write("**Chamadas mais lentas recentes**")
+            st.dataframe(slowest_df.style.format(precision=2), use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        st.subheader("Consultas Lentas")
+        st.write(f"Instruções SQL com duração igual ou superior a {SLOW_QUERY_MS:.0f} ms, "
+                 f"registadas com o plano de execução em `{SLOW_QUERY_LOG}`.")
+        
+        slow_df = get_slow_query_summary()
+        
+        if slow_df.empty:
+            st.info("Nenhuma consulta lenta registada neste processo.")
+        else:
+            st.dataframe(slow_df.style.format(precision=2), use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        st.subheader("Perfil de Execução")
+        st.write("Ativa o cProfile nas próximas execuções da aplicação (de qualquer utilizador) "
+                 f"e guarda os perfis em `{PROFILE_DIR}`.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            n_reruns = st.number_input("Número de execuções a analisar", min_value=1, max_value=100, value=5, key="profile_reruns")
+            if st.button("▶️ Ativar profiler", key="enable_profiler", use_container_width=True):
+                enable_profiler(int(n_reruns))
+            if st.button("⏹️ Cancelar", key="disable_profiler", use_container_width=True):
+                enable_profiler(0)
+        with col2:
+            st.metric("Execuções pendentes", PROFILER_STATE['remaining'])
+        
+        profiles = list_profiles()
+        if profiles:
+            selected_profile = st.selectbox("Perfis guardados", profiles, key="selected_profile")
             
-            if not hpo_df.empty:
-                st.write(f"Primeira resposta HPO: {hpo_df['timestamp'].min()}")
-                st.write(f"Última resposta HPO: {hpo_df['timestamp'].max()}")
+            with open(os.path.join(PROFILE_DIR, selected_profile), 'rb') as f:
+                st.download_button(
+                    label="Descarregar perfil",
+                    data=f.read(),
+                    file_name=selected_profile,
+                    mime="application/octet-stream",
+                    use_container_width=True
+                )
             
-            if not lideranca_df.empty:
-                st.write(f"Primeira resposta Liderança: {lideranca_df['timestamp'].min()}")
-                st.write(f"Última resposta Liderança: {lideranca_df['timestamp'].max()}")
+            st.write("**Funções com maior tempo acumulado**")
+            st.dataframe(get_profile_top_functions(selected_profile).style.format(precision=2),
+                         use_container_width=True, hide_index=True)
+        else:
+            st.info("Ainda não existem perfis guardados.")
 
-# Página principal
-def main():
+# Função para apresentar a página correspondente ao utilizador
+def render_app():
+    # As submissões vão sempre para a campanha ativa; os painéis escolhem a sua no seletor da barra lateral
+    select_campaign(None)
+    start_scheduler()
+    
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
         st.session_state.role = None
@@ -1729,13 +4382,28 @@ def main():
             if st.session_state.form_type is None:
                 form_selection_page()
             elif st.session_state.form_type == "hpo":
-                survey_hpo_page()
+                with timed_block("render:survey_hpo_page"):
+                    survey_hpo_page()
             elif st.session_state.form_type == "lideranca":
-                survey_lideranca_page()
+                with timed_block("render:survey_lideranca_page"):
+                    survey_lideranca_page()
         elif st.session_state.role == "administrador":
-            admin_page()
+            with timed_block("render:admin_page"):
+                admin_page()
         elif st.session_state.role == "gestor":
-            manager_page()
+            with timed_block("render:manager_page"):
+                manager_page()
+
+# Página principal
+def main():
+    # O profiler só é usado quando um administrador o ativa; caso contrário não há custo adicional
+    if PROFILER_STATE['remaining'] > 0 and claim_profiled_rerun():
+        label = st.session_state.get('role') or "login"
+        if st.session_state.get('form_type'):
+            label += f"_{st.session_state.form_type}"
+        profile_rerun(render_app, label)
+    else:
+        render_app()
 
 if __name__ == "__main__":
     # Inicializar banco de dados
@@ -0,0 +1,173 @@
+"""
+Benchmark das funções de carregamento, estatísticas e relatórios do aap.py.
+
+Cria bases de dados sintéticas com vários tamanhos, executa cada função
+medida e grava o tempo e o pico de memória num ficheiro JSON, para que
+execuções diferentes (antes/depois de uma alteração) possam ser comparadas.
+
+Utilização:
+    python benchmarks/benchmark_aap.py
+    python benchmarks/benchmark_aap.py --sizes 1000 100000 --output resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aap  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+HPO_COLUMNS = ['a1', 'a2', 'b1', 'b2', 'c1', 'c2', 'd1', 'd2', 'e1', 'e2', 'f1', 'f2', 'g1', 'g2']
+INSERT_BATCH = 50_000
+
+
+# Função para gerar timestamps sintéticos ao longo de uma campanha de 90 dias
+def synthetic_timestamps(n_rows, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    span = 90 * 24 * 3600
+    return sorted(start + timedelta(seconds=rng.randrange(span), microseconds=rng.randrange(1_000_000))
+                  for _ in range(n_rows))
+
+
+# Função para criar uma base de dados sintética com n_rows linhas em cada tabela de respostas
+def create_synthetic_db(path, n_rows, seed=42):
+    if os.path.exists(path):
+        os.remove(path)
+
+    aap.DB_PATH = path
+    aap.SNAPSHOT_DIR = os.path.join(os.path.dirname(path), f"snapshots_{n_rows}")
+    aap.init_db()
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+
+    timestamps = synthetic_timestamps(n_rows, seed)
+    for start in range(0, n_rows, INSERT_BATCH):
+        batch = []
+        for ts in timestamps[start:start + INSERT_BATCH]:
+            values = tuple(rng.randint(1, 7) for _ in HPO_COLUMNS)
+            comentario = "Comentário sintético" if rng.random() < 0.05 else ""
+            batch.append((str(ts),) + values + (comentario,))
+        c.executemany(f'''INSERT INTO responses
+                          (timestamp, {', '.join(HPO_COLUMNS)}, comentario)
+                          VALUES (?, {', '.join('?' * len(HPO_COLUMNS))}, ?)''', batch)
+
+    # Liderança: cada sessão contribui com 6 linhas (q1..q6)
+    for start in range(0, n_rows, INSERT_BATCH):
+        batch = []
+        for row in range(start, min(start + INSERT_BATCH, n_rows)):
+            if row % 6 == 0:
+                session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            batch.append((session_id, str(timestamps[row]), f"q{row % 6 + 1}",
+                          rng.choice(['a', 'b']), round(rng.uniform(2.0, 60.0), 3)))
+        c.executemany('''INSERT INTO lideranca_responses
+                         (session_id, timestamp, question_id, response, response_time)
+                         VALUES (?, ?, ?, ?, ?)''', batch)
+
+    # As linhas foram inseridas diretamente, por isso as agregações temporais são recalculadas
+    aap.rebuild_rollups(c)
+
+    conn.commit()
+    conn.close()
+
+
+# Função para medir tempo e pico de memória de uma chamada
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {'seconds': round(elapsed, 6), 'peak_memory_bytes': peak}
+
+
+# Função para executar todas as medições numa base de dados já criada
+def run_benchmarks(n_rows):
+    results = {}
+
+    hpo_df, results['load_hpo_responses'] = measure(aap.load_hpo_responses)
+    lideranca_df, results['load_lideranca_responses'] = measure(aap.load_lideranca_responses)
+
+    hpo_stats, results['calculate_hpo_stats'] = measure(aap.calculate_hpo_stats, hpo_df)
+    lideranca_stats, results['calculate_lideranca_stats'] = measure(aap.calculate_lideranca_stats, lideranca_df)
+
+    _, results['load_hpo_distribution'] = measure(aap.load_hpo_distribution)
+
+    if aap.PYARROW_AVAILABLE:
+        # Primeira leitura constrói o snapshot; a segunda mede a leitura colunar já materializada
+        for table in ('responses', 'lideranca_responses'):
+            _, results[f'load_snapshot[{table}:build]'] = measure(aap.load_snapshot, table)
+            _, results[f'load_snapshot[{table}]'] = measure(aap.load_snapshot, table)
+
+    for granularity in aap.ROLLUP_GRANULARITIES:
+        _, results[f'load_hpo_trend[{granularity}]'] = measure(aap.load_hpo_trend, granularity)
+        _, results[f'load_lideranca_trend[{granularity}]'] = measure(aap.load_lideranca_trend, granularity)
+
+    stats, performance, overall_performance, dispersion = hpo_stats
+    _, results['generate_hpo_html_report'] = measure(
+        aap.generate_hpo_html_report, stats, performance, overall_performance, hpo_df, dispersion)
+
+    question_stats, overall_accuracy = lideranca_stats
+    _, results['generate_lideranca_html_report'] = measure(
+        aap.generate_lideranca_html_report, question_stats, overall_accuracy, lideranca_df,
+        aap.calculate_response_time_stats(lideranca_df), aap.load_lideranca_options())
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das funções de análise do aap.py")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Número de linhas por tabela de respostas (por omissão: 1k, 100k e 1M)")
+    parser.add_argument('--output', default=None,
+                        help="Ficheiro JSON de resultados (por omissão: benchmarks/results/benchmark_<data>.json)")
+    parser.add_argument('--workdir', default=None,
+                        help="Diretório para as bases de dados sintéticas (por omissão: diretório temporário)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results',
+        f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': {}
+    }
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for n_rows in args.sizes:
+            db_path = os.path.join(workdir, f"bench_{n_rows}.db")
+            print(f"A criar base de dados sintética com {n_rows} linhas...")
+            create_synthetic_db(db_path, n_rows)
+
+            print(f"A medir funções com {n_rows} linhas...")
+            results = run_benchmarks(n_rows)
+            report['sizes'][str(n_rows)] = results
+
+            for name, metrics in results.items():
+                print(f"  {name:35s} {metrics['seconds']:10.4f} s  "
+                      f"{metrics['peak_memory_bytes'] / 1024 / 1024:10.2f} MiB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Comparação dos motores analíticos do aap.py: pandas (referência) e DuckDB.
+
+Para cada tamanho cria uma base de dados sintética (reutilizando
+benchmark_aap.create_synthetic_db) e mede, com os dois motores, as
+estatísticas HPO e de Liderança e a distribuição das pontuações. O motor
+pandas inclui o carregamento dos dados a partir do SQLite; o DuckDB lê o snapshot Parquet, cuja construção é medida à parte.
+Os resultados dos dois motores são comparados antes de gravar o JSON.
+As evoluções temporais não entram na comparação: são lidas das tabelas de
+agregação (hpo_rollup/lideranca_rollup), mais rápidas que qualquer varrimento.
+
+Utilização:
+    python benchmarks/benchmark_backends.py
+    python benchmarks/benchmark_backends.py --sizes 1000000 --output motores.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import aap  # noqa: E402
+from benchmark_aap import create_synthetic_db, measure  # noqa: E402
+
+DEFAULT_SIZES = [1_000_000, 10_000_000]
+
+
+# Funções do motor pandas, incluindo o carregamento que o painel faz antes de calcular
+def pandas_hpo_stats():
+    return aap.calculate_hpo_stats(aap.load_hpo_responses(compact=True))
+
+
+def pandas_lideranca_stats():
+    return aap.calculate_lideranca_stats(aap.load_lideranca_responses(compact=True))
+
+
+# Função para verificar que os dois motores devolvem os mesmos números
+def check_equivalence(pandas_results, duckdb_results):
+    hpo_pandas, hpo_duckdb = pandas_results['hpo_stats'][0], duckdb_results['hpo_stats'][0]
+    if any(abs(hpo_pandas[dim] - hpo_duckdb[dim]) > 1e-9 for dim in hpo_pandas):
+        raise AssertionError("Estatísticas HPO diferentes entre motores")
+
+    lid_pandas, lid_duckdb = pandas_results['lideranca_stats'], duckdb_results['lideranca_stats']
+    if abs(lid_pandas[1] - lid_duckdb[1]) > 1e-9 or any(
+            lid_pandas[0][q]['corretas'] != lid_duckdb[0][q]['corretas'] for q in lid_pandas[0]):
+        raise AssertionError("Estatísticas de Liderança diferentes entre motores")
+
+    dist_pandas = pandas_results['hpo_distribution'].sort_values(['item', 'value'])
+    dist_duckdb = duckdb_results['hpo_distribution'].sort_values(['item', 'value'])
+    if dist_pandas['frequency'].tolist() != dist_duckdb['frequency'].tolist():
+        raise AssertionError("Distribuição HPO diferente entre motores")
+
+
+# Função para executar as medições dos dois motores numa base de dados já criada
+def run_benchmarks():
+    results = {'pandas': {}, 'duckdb': {}}
+    values = {'pandas': {}, 'duckdb': {}}
+
+    values['pandas']['hpo_stats'], results['pandas']['hpo_stats'] = measure(pandas_hpo_stats)
+    values['pandas']['lideranca_stats'], results['pandas']['lideranca_stats'] = measure(pandas_lideranca_stats)
+    values['pandas']['hpo_distribution'], results['pandas']['hpo_distribution'] = measure(
+        aap.load_hpo_distribution)
+
+    # A primeira consulta DuckDB de cada tabela constrói o snapshot Parquet
+    for table in ('responses', 'lideranca_responses'):
+        _, results['duckdb'][f'snapshot_build[{table}]'] = measure(aap.refresh_snapshot, table)
+
+    values['duckdb']['hpo_stats'], results['duckdb']['hpo_stats'] = measure(aap.duckdb_hpo_stats)
+    values['duckdb']['lideranca_stats'], results['duckdb']['lideranca_stats'] = measure(aap.duckdb_lideranca_stats)
+    values['duckdb']['hpo_distribution'], results['duckdb']['hpo_distribution'] = measure(
+        aap.duckdb_hpo_distribution)
+
+    check_equivalence(values['pandas'], values['duckdb'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparação dos motores analíticos pandas e DuckDB")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Número de linhas por tabela de respostas (por omissão: 1M e 10M)")
+    parser.add_argument('--output', default=None,
+                        help="Ficheiro JSON de resultados (por omissão: benchmarks/results/backends_<data>.json)")
+    parser.add_argument('--workdir', default=None,
+                        help="Diretório para as bases de dados sintéticas (por omissão: diretório temporário)")
+    args = parser.parse_args()
+
+    if not (aap.DUCKDB_AVAILABLE and aap.PYARROW_AVAILABLE):
+        sys.exit("Este benchmark requer os pacotes duckdb e pyarrow.")
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results',
+        f"backends_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'duckdb': aap.duckdb.__version__,
+        'sizes': {}
+    }
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for n_rows in args.sizes:
+            db_path = os.path.join(workdir, f"bench_{n_rows}.db")
+            print(f"A criar base de dados sintética com {n_rows} linhas...")
+            create_synthetic_db(db_path, n_rows)
+            # Os snapshots Parquet ficam no diretório temporário, nunca nos snapshots da aplicação
+            aap.SNAPSHOT_DIR = os.path.join(workdir, f"snapshots_{n_rows}")
+
+            print(f"A comparar motores com {n_rows} linhas...")
+            results = run_benchmarks()
+            report['sizes'][str(n_rows)] = results
+
+            for name in results['pandas']:
+                pandas_seconds = results['pandas'][name]['seconds']
+                duckdb_seconds = results['duckdb'][name]['seconds']
+                print(f"  {name:28s} pandas {pandas_seconds:9.4f} s   duckdb {duckdb_seconds:9.4f} s   "
+                      f"x{pandas_seconds / duckdb_seconds:6.1f}")
+            for name in results['duckdb']:
+                if name.startswith('snapshot_build'):
+                    print(f"  {name:28s} {results['duckdb'][name]['seconds']:9.4f} s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Impacto das cópias de segurança na latência das submissões.
+
+Cria uma base de dados sintética com o tamanho pedido (por omissão 1 GB) e,
+numa thread, grava respostas HPO com save_hpo_response a ritmo constante,
+medindo a latência de cada gravação em três fases, para cada ritmo pedido:
+  - sem cópia (referência);
+  - durante uma cópia em passos (copy_database, como nas cópias do aap.py);
+  - durante uma cópia num só passo (pages=-1), para comparação.
+Reporta os percentis da latência, a duração de cada cópia e o número de
+vezes que a cópia em passos recomeçou por causa das escritas (cada escrita
+feita por outra ligação reinicia a cópia; após BACKUP_MAX_RESTARTS reinícios
+a cópia termina num só passo, bloqueando as escritas até ao fim).
+
+Utilização:
+    python benchmarks/benchmark_backup.py
+    python benchmarks/benchmark_backup.py --size-mb 200 --rates 1 50 --output backup.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import aap  # noqa: E402
+from benchmark_aap import create_synthetic_db  # noqa: E402
+from load_test_aap import percentile  # noqa: E402
+
+# Linhas por tabela de respostas por MB da base de dados sintética (medido com create_synthetic_db)
+ROWS_PER_MB = 2400
+
+
+# Função executada pela thread de escrita: grava respostas ao ritmo pedido até stop ser ativado
+def run_writer(rate, stop, latencies, errors):
+    rng = random.Random(7)
+    interval = 1 / rate
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            aap.save_hpo_response([rng.randint(1, 7) for _ in aap.HPO_ITEMS])
+        except aap.sqlite3.Error as e:
+            errors.append(str(e))
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        time.sleep(max(0.0, interval - elapsed))
+
+
+# Função para medir a latência das escritas enquanto `action` corre (ou durante `seconds`, sem ação)
+def measure_phase(rate, action=None, seconds=None):
+    stop = threading.Event()
+    latencies, errors = [], []
+    writer = threading.Thread(target=run_writer, args=(rate, stop, latencies, errors))
+    writer.start()
+
+    start = time.perf_counter()
+    result = action() if action else time.sleep(seconds)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    writer.join()
+    return {
+        'seconds': round(elapsed, 3),
+        'result': result,
+        'writes': len(latencies),
+        'errors': len(errors),
+        'latency_ms': {f"p{pct}": round(percentile(latencies, pct) * 1000, 2) for pct in (50, 95, 99, 100)}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impacto das cópias de segurança na latência das submissões")
+    parser.add_argument('--size-mb', type=int, default=1024, help="Tamanho aproximado da base de dados (MB)")
+    parser.add_argument('--rates', type=float, nargs='+', default=[2, 20],
+                        help="Submissões por segundo durante as medições (uma série de fases por ritmo)")
+    parser.add_argument('--baseline-seconds', type=float, default=10, help="Duração da fase sem cópia")
+    parser.add_argument('--workdir', default=None, help="Diretório da base de dados sintética")
+    parser.add_argument('--output', default=None, help="Ficheiro JSON de resultados")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        db_path = os.path.join(workdir, "backup_bench.db")
+        print(f"A criar base de dados sintética com cerca de {args.size_mb} MB...")
+        create_synthetic_db(db_path, args.size_mb * ROWS_PER_MB)
+        size_mb = os.path.getsize(db_path) / 1024 ** 2
+
+        report = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'database_mb': round(size_mb, 1),
+            'journal_mode': aap.JOURNAL_MODE,
+            'step_pages': aap.BACKUP_STEP_PAGES,
+            'step_pause': aap.BACKUP_STEP_PAUSE,
+            'rates': {}
+        }
+        for rate in args.rates:
+            phases = {
+                'sem_copia': lambda: measure_phase(rate, seconds=args.baseline_seconds),
+                'copia_em_passos': lambda: measure_phase(
+                    rate, lambda: aap.copy_database(db_path, os.path.join(workdir, "copia_passos.db"))),
+                'copia_num_passo': lambda: measure_phase(
+                    rate, lambda: aap.copy_database(db_path, os.path.join(workdir, "copia_unica.db"), pages=-1))
+            }
+
+            report['rates'][str(rate)] = {}
+            for name, run_phase in phases.items():
+                summary = run_phase()
+                # Nas cópias, o resultado é o número de reinícios
+                summary['restarts'] = summary.pop('result')
+                report['rates'][str(rate)][name] = summary
+                print(f"[{rate:g}/s {name}] {summary['seconds']:.2f} s, {summary['writes']} escritas, "
+                      f"latência (ms) {summary['latency_ms']}, erros: {summary['errors']}, "
+                      f"reinícios: {summary['restarts']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Teste de carga com respondentes simultâneos usando o AppTest do Streamlit.
+
+Cada sessão simulada executa o aap.py através de streamlit.testing.v1.AppTest,
+preenche o questionário HPO (uma submissão) ou o questionário de Liderança
+(seis passos), contra uma base de dados temporária. As sessões são
+distribuídas por vários processos em paralelo. No fim são reportadas submissões por segundo, percentis da latência
+de cada rerun e o número de erros de bloqueio do SQLite.
+
+O AppTest instala um Runtime global no processo durante cada rerun, pelo que
+não pode ser usado em várias threads ao mesmo tempo: dentro de cada processo
+as sessões correm em sequência e a concorrência vem do número de processos.
+
+Utilização:
+    python benchmarks/load_test_aap.py --sessions 200 --processes 8
+    python benchmarks/load_test_aap.py --survey lideranca --output carga.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'aap.py')
+HPO_KEYS = [f"{dim}{i}" for dim in 'abcdefg' for i in (1, 2)]
+LIDERANCA_STEPS = 6
+
+
+# Função para criar um AppTest já autenticado como trabalhador
+def new_worker_app(form_type, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+    at.session_state['logged_in'] = True
+    at.session_state['role'] = "trabalhador"
+    at.session_state['form_type'] = form_type
+    at.session_state['submitted'] = False
+    return at
+
+
+# Função para executar um rerun e registar a latência e eventuais erros
+def timed_run(at, result, action=None):
+    start = time.perf_counter()
+    if action is None:
+        at.run()
+    else:
+        action.run()
+    result['latencies'].append(time.perf_counter() - start)
+
+    for exc in at.exception:
+        if 'locked' in exc.message or 'busy' in exc.message:
+            result['lock_errors'] += 1
+        else:
+            result['other_errors'].append(exc.message)
+    return not at.exception
+
+
+# Função para simular um respondente do questionário HPO
+def simulate_hpo_session(rng, timeout):
+    result = {'latencies': [], 'lock_errors': 0, 'other_errors': [], 'submitted': 0}
+    at = new_worker_app("hpo", timeout)
+    if not timed_run(at, result):
+        return result
+
+    for key in HPO_KEYS:
+        at.slider(key=key).set_value(rng.randint(1, 7))
+    if rng.random() < 0.2:
+        at.text_area(key="comentario").input("Comentário do teste de carga")
+
+    if timed_run(at, result, at.button[0].click()):
+        if any('submetido' in s.value for s in at.success):
+            result['submitted'] = 1
+    return result
+
+
+# Função para simular um respondente do questionário de Liderança (seis passos)
+def simulate_lideranca_session(rng, timeout):
+    result = {'latencies': [], 'lock_errors': 0, 'other_errors': [], 'submitted': 0}
+    at = new_worker_app("lideranca", timeout)
+    if not timed_run(at, result):
+        return result
+
+    for _ in range(LIDERANCA_STEPS):
+        radio = at.radio[0]
+        radio.set_value(rng.choice(radio.options))
+        if not timed_run(at, result, at.button[0].click()):
+            return result
+
+    if any('concluído' in s.value for s in at.success):
+        result['submitted'] = 1
+    return result
+
+
+# Função executada em cada processo: corre um conjunto de sessões em sequência
+def run_worker(args):
+    db_path, survey, n_sessions, seed, timeout = args
+    os.environ['HPO_DB_PATH'] = db_path
+    # Sem agendador: as tarefas de manutenção (cópia, snapshots, optimize) distorceriam as latências medidas
+    os.environ['HPO_SCHEDULER'] = '0'
+
+    simulate = simulate_hpo_session if survey == "hpo" else simulate_lideranca_session
+    rng = random.Random(seed)
+    return [simulate(rng, timeout) for _ in range(n_sessions)]
+
+
+# Função para calcular um percentil simples (interpolação linear)
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do aap.py com sessões simultâneas")
+    parser.add_argument('--survey', choices=["hpo", "lideranca", "ambos"], default="ambos")
+    parser.add_argument('--sessions', type=int, default=100, help="Sessões simuladas por questionário")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                        help="Número de processos simultâneos")
+    parser.add_argument('--timeout', type=float, default=60, help="Tempo máximo por rerun (segundos)")
+    parser.add_argument('--output', default=None, help="Ficheiro JSON de resultados")
+    args = parser.parse_args()
+
+    surveys = ["hpo", "lideranca"] if args.survey == "ambos" else [args.survey]
+    report = {'generated_at': datetime.now().isoformat(timespec='seconds'),
+              'processes': args.processes, 'surveys': {}}
+
+    workdir = tempfile.mkdtemp(prefix="hpo_load_")
+    try:
+        db_path = os.path.join(workdir, "load_test.db")
+
+        # O AppTest substitui o módulo __main__ do processo em que corre, por isso
+        # todas as sessões (incluindo a criação do esquema) correm em processos
+        # filhos novos, um por tarefa
+        pool = multiprocessing.get_context("spawn").Pool(args.processes, maxtasksperchild=1)
+        pool.map(run_worker, [(db_path, "hpo", 1, 0, args.timeout)])
+
+        for survey in surveys:
+            per_process = [args.sessions // args.processes + (1 if i < args.sessions % args.processes else 0)
+                           for i in range(args.processes)]
+            tasks = [(db_path, survey, n, i + 1, args.timeout)
+                     for i, n in enumerate(per_process) if n > 0]
+
+            start = time.perf_counter()
+            chunks = pool.map(run_worker, tasks)
+            elapsed = time.perf_counter() - start
+
+            sessions = [s for chunk in chunks for s in chunk]
+            latencies = [lat for s in sessions for lat in s['latencies']]
+            submitted = sum(s['submitted'] for s in sessions)
+            other_errors = [err for s in sessions for err in s['other_errors']]
+
+            summary = {
+                'sessions': len(sessions),
+                'submitted': submitted,
+                'elapsed_seconds': round(elapsed, 3),
+                'submissions_per_second': round(submitted / elapsed, 3) if elapsed else None,
+                'reruns': len(latencies),
+                'rerun_latency_seconds': {
+                    f"p{pct}": round(percentile(latencies, pct), 4) if latencies else None
+                    for pct in (50, 90, 95, 99)
+                },
+                'lock_errors': sum(s['lock_errors'] for s in sessions),
+                'other_errors': len(other_errors),
+                'other_error_samples': sorted(set(other_errors))[:5]
+            }
+            report['surveys'][survey] = summary
+
+            print(f"[{survey}] {submitted}/{len(sessions)} submissões em {elapsed:.2f} s "
+                  f"({summary['submissions_per_second']} submissões/s)")
+            print(f"[{survey}] latência por rerun: {summary['rerun_latency_seconds']}")
+            print(f"[{survey}] erros de bloqueio: {summary['lock_errors']}, outros erros: {summary['other_errors']}")
+
+        pool.close()
+        pool.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Teste de carga do serviço de ingestão JSON (ingest_server.py).
+
+Inicia o serviço numa porta livre contra uma base de dados temporária e envia
+submissões HPO e/ou de Liderança a partir de vários clientes em paralelo
+(ligações HTTP persistentes). Reporta pedidos por segundo, percentis da
+latência e erros. Com --streamlit-sessions > 0 corre também o
+load_test_aap.py com o mesmo questionário, para comparar o débito com o
+caminho Streamlit (AppTest).
+
+Utilização:
+    python benchmarks/load_test_ingest.py --requests 5000 --clients 16
+    python benchmarks/load_test_ingest.py --survey hpo --streamlit-sessions 0
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from load_test_aap import HPO_KEYS, percentile  # noqa: E402
+
+
+# Funções para gerar o corpo JSON de uma submissão aleatória
+def hpo_payload(rng):
+    body = {'responses': {key: rng.randint(1, 7) for key in HPO_KEYS}}
+    if rng.random() < 0.2:
+        body['comentario'] = "Comentário do teste de carga"
+    return body
+
+
+def lideranca_payload(rng):
+    return {'answers': [{'question_id': f"q{i}", 'response': rng.choice(['a', 'b']),
+                         'response_time': round(rng.uniform(2.0, 60.0), 3)} for i in range(1, 7)]}
+
+
+# Função executada por cada cliente: envia n pedidos pela mesma ligação
+def run_client(port, survey, n_requests, seed, result):
+    rng = random.Random(seed)
+    make_payload = hpo_payload if survey == "hpo" else lideranca_payload
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    for _ in range(n_requests):
+        body = json.dumps(make_payload(rng))
+        start = time.perf_counter()
+        try:
+            conn.request('POST', f"/{survey}", body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            result['errors'].append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            continue
+        result['latencies'].append(time.perf_counter() - start)
+
+        if status == 201:
+            result['submitted'] += 1
+        else:
+            result['errors'].append(f"HTTP {status}")
+    conn.close()
+
+
+# Função para correr o teste de carga do caminho Streamlit e devolver o resumo de um questionário
+def run_streamlit_baseline(survey, sessions, processes):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    try:
+        subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'load_test_aap.py'), '--survey', survey,
+                        '--sessions', str(sessions), '--processes', str(processes), '--output', output],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(output, encoding='utf-8') as f:
+            return json.load(f)['surveys'][survey]
+    finally:
+        os.remove(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do serviço de ingestão JSON")
+    parser.add_argument('--survey', choices=["hpo", "lideranca", "ambos"], default="ambos")
+    parser.add_argument('--requests', type=int, default=2000, help="Pedidos por questionário")
+    parser.add_argument('--clients', type=int, default=16, help="Clientes HTTP simultâneos")
+    parser.add_argument('--streamlit-sessions', type=int, default=40,
+                        help="Sessões do teste Streamlit para comparação (0 para não comparar)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 2,
+                        help="Processos do teste Streamlit")
+    parser.add_argument('--output', default=None, help="Ficheiro JSON de resultados")
+    args = parser.parse_args()
+
+    surveys = ["hpo", "lideranca"] if args.survey == "ambos" else [args.survey]
+    report = {'generated_at': datetime.now().isoformat(timespec='seconds'),
+              'clients': args.clients, 'surveys': {}}
+
+    workdir = tempfile.mkdtemp(prefix="hpo_ingest_")
+    try:
+        # O aap.py lê o caminho da base de dados ao ser importado
+        os.environ['HPO_DB_PATH'] = os.path.join(workdir, "ingest_test.db")
+        os.environ['HPO_SNAPSHOT_DIR'] = os.path.join(workdir, "snapshots")
+        os.environ['HPO_SCHEDULER'] = '0'
+        import ingest_server
+
+        server = ingest_server.create_server('127.0.0.1', 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+
+        for survey in surveys:
+            per_client = [args.requests // args.clients + (1 if i < args.requests % args.clients else 0)
+                          for i in range(args.clients)]
+            results = [{'latencies': [], 'errors': [], 'submitted': 0} for _ in per_client]
+            threads = [threading.Thread(target=run_client, args=(port, survey, n, i + 1, results[i]))
+                       for i, n in enumerate(per_client) if n > 0]
+
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            latencies = [lat for r in results for lat in r['latencies']]
+            errors = [err for r in results for err in r['errors']]
+            submitted = sum(r['submitted'] for r in results)
+
+            summary = {
+                'requests': args.requests,
+                'submitted': submitted,
+                'elapsed_seconds': round(elapsed, 3),
+                'requests_per_second': round(submitted / elapsed, 1) if elapsed else None,
+                'latency_seconds': {
+                    f"p{pct}": round(percentile(latencies, pct), 4) if latencies else None
+                    for pct in (50, 90, 95, 99)
+                },
+                'errors': len(errors),
+                'error_samples': sorted(set(errors))[:5]
+            }
+
+            print(f"[{survey}] JSON: {submitted}/{args.requests} submissões em {elapsed:.2f} s "
+                  f"({summary['requests_per_second']} pedidos/s)")
+            print(f"[{survey}] JSON: latência {summary['latency_seconds']}, erros: {summary['errors']}")
+
+            if args.streamlit_sessions > 0:
+                baseline = run_streamlit_baseline(survey, args.streamlit_sessions, args.processes)
+                summary['streamlit'] = baseline
+                if baseline['submissions_per_second']:
+                    summary['speedup'] = round(summary['requests_per_second'] / baseline['submissions_per_second'], 1)
+                print(f"[{survey}] Streamlit: {baseline['submissions_per_second']} submissões/s "
+                      f"(x{summary.get('speedup')} com o serviço JSON)")
+
+            report['surveys'][survey] = summary
+
+        server.shutdown()
+        server.server_close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados gravados em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Verificação do orçamento de memória dos DataFrames de respostas em modo compacto.
+
+Cria uma base de dados sintética (por omissão com 1M de linhas por tabela),
+carrega as respostas HPO e de Liderança com os tipos originais e em modo
+compacto, e mostra a memória ocupada por 1M de linhas em cada caso. Termina
+com código de saída 1 se o modo compacto exceder COMPACT_MEMORY_BUDGET_MB.
+
+Utilização:
+    python benchmarks/memory_budget.py
+    python benchmarks/memory_budget.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aap  # noqa: E402
+from benchmark_aap import create_synthetic_db  # noqa: E402
+
+
+# Função para calcular a memória de um DataFrame por 1M de linhas (sem o texto dos comentários)
+def megabytes_per_million(df, n_rows):
+    usage = df.memory_usage(index=False, deep=True)
+    if 'comentario' in usage:
+        # Contar apenas os ponteiros da coluna de comentários, cujo texto depende dos participantes
+        usage['comentario'] = df['comentario'].memory_usage(index=False, deep=False)
+    return usage.sum() / 1024 / 1024 * 1_000_000 / n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória dos DataFrames de respostas antes e depois do modo compacto")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Número de linhas por tabela de respostas")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        create_synthetic_db(os.path.join(workdir, "memory.db"), args.rows)
+
+        results = {
+            'hpo': (megabytes_per_million(aap.load_hpo_responses(), args.rows),
+                    megabytes_per_million(aap.load_hpo_responses(compact=True), args.rows)),
+            'lideranca': (megabytes_per_million(aap.load_lideranca_responses(), args.rows),
+                          megabytes_per_million(aap.load_lideranca_responses(compact=True), args.rows))
+        }
+
+    within_budget = True
+    for table, (before, after) in results.items():
+        budget = aap.COMPACT_MEMORY_BUDGET_MB[table]
+        status = "OK" if after <= budget else "ACIMA DO ORÇAMENTO"
+        within_budget = within_budget and after <= budget
+        print(f"{table:10s} antes: {before:8.1f} MB/1M linhas   depois: {after:8.1f} MB/1M linhas   "
+              f"orçamento: {budget} MB   {status}")
+
+    sys.exit(0 if within_budget else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Serviço HTTP de ingestão de respostas em JSON, para quiosques e integrações.
+
+Recebe submissões HPO e de Liderança sem passar pelo Streamlit (sem reruns
+nem websocket), valida-as com as mesmas regras dos questionários do aap.py e
+grava-as com save_hpo_responses/save_lideranca_responses. Uma única thread
+de escrita junta as submissões que chegam ao mesmo tempo e grava cada lote
+numa só transação; cada pedido só recebe resposta depois do commit. As
+respostas são gravadas na campanha ativa (escolhida no separador Manutenção).
+
+Endpoints:
+    POST /hpo         {"responses": {"a1": 5, ..., "g2": 7}, "comentario": "opcional", "session_id": "opcional"}
+    POST /lideranca   {"session_id": "opcional", "answers": [{"question_id": "q1", "response": "a",
+                                                              "response_time": 4.2}, ...]}
+    POST /journal     {"records": [...]}  registos do diário de um quiosque (ver kiosk_sync.py),
+                      gravados numa só transação e ignorando sessões já gravadas
+    GET  /health
+
+O session_id identifica a submissão: reenviar um pedido com o mesmo session_id
+(ex.: após um timeout) não duplica a resposta.
+
+Se a variável HPO_INGEST_TOKEN estiver definida, os pedidos POST têm de
+incluir o cabeçalho "Authorization: Bearer <token>".
+
+Utilização:
+    python ingest_server.py --port 8600
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aap
+
+INGEST_TOKEN = os.environ.get('HPO_INGEST_TOKEN')
+# Tamanho máximo de um lote e tempo máximo de espera por mais submissões antes de gravar
+BATCH_MAX = 200
+BATCH_WAIT = 0.005
+# Tamanho máximo do corpo de um pedido (bytes); os lotes de diário de quiosque podem ser maiores
+MAX_BODY = 64 * 1024
+MAX_JOURNAL_BODY = 32 * 1024 * 1024
+
+SUBMISSIONS = queue.Queue()
+
+# Função para validar o corpo de um lote do diário (os registos são validados um a um na gravação)
+def validate_journal_batch(data):
+    if not isinstance(data, dict) or not isinstance(data.get('records'), list):
+        raise ValueError("O campo 'records' deve ser uma lista de registos do diário")
+    return data['records']
+
+
+VALIDATORS = {
+    '/hpo': ('hpo', aap.validate_hpo_submission),
+    '/lideranca': ('lideranca', aap.validate_lideranca_submission),
+    '/journal': ('journal', validate_journal_batch)
+}
+
+
+# Função para gravar um lote de submissões já validadas (uma transação por questionário)
+def write_batch(batch):
+    hpo = [item['payload'] for item in batch if item['kind'] == 'hpo']
+    lideranca = [item['payload'] for item in batch if item['kind'] == 'lideranca']
+
+    if hpo:
+        aap.save_hpo_responses(hpo)
+    if lideranca:
+        aap.save_lideranca_responses(lideranca)
+    
+    # Cada lote de diário já é grande: é gravado na sua própria transação
+    for item in batch:
+        if item['kind'] == 'journal':
+            item['result'] = aap.sync_journal_records(item['payload'])
+
+
+# Ciclo da thread de escrita: junta as submissões em espera e grava-as em lote
+def writer_loop():
+    while True:
+        batch = [SUBMISSIONS.get()]
+        deadline = time.monotonic() + BATCH_WAIT
+        while len(batch) < BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(SUBMISSIONS.get(timeout=remaining) if remaining > 0 else SUBMISSIONS.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            write_batch(batch)
+        except Exception as e:
+            for item in batch:
+                item['error'] = str(e)
+
+        for item in batch:
+            item['done'].set()
+
+
+# Função para colocar uma submissão na fila de escrita e esperar pelo commit
+def submit(kind, payload):
+    item = {'kind': kind, 'payload': payload, 'done': threading.Event(), 'error': None, 'result': None}
+    SUBMISSIONS.put(item)
+    item['done'].wait()
+    return item['error'], item['result']
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    # Ligações persistentes: um quiosque pode enviar várias submissões pela mesma ligação
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo são escritos em separado: sem TCP_NODELAY cada resposta espera pelo ACK atrasado
+    disable_nagle_algorithm = True
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok', 'pending': SUBMISSIONS.qsize()})
+        else:
+            self.send_json(404, {'error': "Endpoint desconhecido"})
+
+    def do_POST(self):
+        if self.path not in VALIDATORS:
+            self.send_json(404, {'error': "Endpoint desconhecido"})
+            return
+
+        if INGEST_TOKEN and self.headers.get('Authorization') != f"Bearer {INGEST_TOKEN}":
+            self.send_json(401, {'error': "Token inválido"})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        max_body = MAX_JOURNAL_BODY if self.path == '/journal' else MAX_BODY
+        if length <= 0 or length > max_body:
+            self.send_json(413 if length > max_body else 400, {'error': "Corpo do pedido inválido"})
+            return
+
+        kind, validate = VALIDATORS[self.path]
+        try:
+            payload = validate(json.loads(self.rfile.read(length)))
+        except (ValueError, UnicodeDecodeError) as e:
+            self.send_json(422, {'error': str(e)})
+            return
+
+        error, result = submit(kind, payload)
+        if error:
+            self.send_json(503, {'error': f"Erro ao gravar a submissão: {error}"})
+        elif result is not None:
+            self.send_json(200, result)
+        else:
+            self.send_json(201, {'status': 'gravado'})
+
+    def log_request(self, code='-', size='-'):
+        # Os pedidos com sucesso não são registados, para não pesar em carga
+        if isinstance(code, int) and code < 400:
+            return
+        super().log_request(code, size)
+
+
+# Função para criar o servidor e iniciar a thread de escrita
+def create_server(host, port):
+    aap.init_db()
+    threading.Thread(target=writer_loop, name="ingest-writer", daemon=True).start()
+    return ThreadingHTTPServer((host, port), IngestHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de ingestão de respostas HPO e de Liderança")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port)
+    print(f"A receber submissões em http://{args.host}:{server.server_port} (base de dados: {aap.DB_PATH})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
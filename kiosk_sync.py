@@ -0,0 +1,108 @@
+"""
+Sincronização dos diários dos quiosques (modo offline) com a base de dados.
+
+Em modo quiosque (HPO_KIOSK_JOURNAL=/caminho/diario.jsonl) o aap.py acrescenta
+cada submissão a um diário local, uma linha JSON por submissão, em vez de a
+gravar na base de dados. Este comando envia esses diários em lotes grandes:
+cada lote é gravado numa única transação e as sessões já existentes (mesmo
+session_id) são ignoradas, pelo que repetir a sincronização não duplica
+respostas.
+
+Antes de ser lido, cada diário é renomeado para <diário>.<data>.sync, para que
+o quiosque continue a escrever num ficheiro novo; depois de sincronizado passa
+a <diário>.<data>.synced. Ficheiros .sync deixados por uma execução
+interrompida são retomados na execução seguinte.
+
+Utilização:
+    python kiosk_sync.py diario.jsonl                                   # grava na campanha ativa (HPO_DB_PATH)
+    python kiosk_sync.py diario.jsonl --url http://servidor:8600 --token segredo
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import urllib.request
+from datetime import datetime
+
+
+# Função para renomear o diário ativo e devolver todos os ficheiros por sincronizar
+def pending_journals(path):
+    if os.path.exists(path):
+        os.replace(path, f"{path}.{datetime.now().strftime('%Y%m%d_%H%M%S')}.sync")
+    return sorted(glob.glob(f"{glob.escape(path)}.*.sync"))
+
+
+# Função para ler um diário; linhas corrompidas (ex.: escrita interrompida) ficam como None
+def read_journal(path):
+    records = []
+    line_numbers = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(None)
+            line_numbers.append(line_number)
+    return records, line_numbers
+
+
+# Função para gravar um lote diretamente na base de dados (HPO_DB_PATH)
+def sync_batch_local(records):
+    import aap
+
+    aap.init_db()
+    return aap.sync_journal_records(records)
+
+
+# Função para enviar um lote ao serviço de ingestão (POST /journal)
+def sync_batch_remote(records, url, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f"Bearer {token}"
+
+    request = urllib.request.Request(f"{url.rstrip('/')}/journal", data=json.dumps({'records': records}).encode('utf-8'),
+                                     headers=headers, method='POST')
+    with urllib.request.urlopen(request, timeout=300) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronização dos diários dos quiosques com a base de dados")
+    parser.add_argument('journals', nargs='+', help="Diários a sincronizar (o caminho definido em HPO_KIOSK_JOURNAL)")
+    parser.add_argument('--url', default=None, help="Endereço do serviço de ingestão (por omissão grava localmente)")
+    parser.add_argument('--token', default=os.environ.get('HPO_INGEST_TOKEN'), help="Token do serviço de ingestão")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Registos por transação")
+    args = parser.parse_args()
+
+    totals = {'hpo': 0, 'lideranca': 0, 'duplicates': 0, 'invalid': 0}
+    for journal in args.journals:
+        for path in pending_journals(journal):
+            records, line_numbers = read_journal(path)
+
+            for start in range(0, len(records), args.batch_size):
+                batch = records[start:start + args.batch_size]
+                if args.url:
+                    result = sync_batch_remote(batch, args.url, args.token)
+                else:
+                    result = sync_batch_local(batch)
+
+                for key in ('hpo', 'lideranca', 'duplicates'):
+                    totals[key] += result[key]
+                for index, error in result['invalid']:
+                    totals['invalid'] += 1
+                    print(f"{path}:{line_numbers[start + index]}: registo ignorado ({error})", file=sys.stderr)
+
+            os.replace(path, path[:-len('.sync')] + '.synced')
+            print(f"{path}: {len(records)} registos processados")
+
+    print(f"Gravadas {totals['hpo']} respostas HPO e {totals['lideranca']} sessões de Liderança; "
+          f"{totals['duplicates']} duplicadas ignoradas, {totals['invalid']} inválidas")
+    if totals['invalid']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import math
+
+import aap
+
+
+def test_dispersion_undefined_for_single_response():
+    dispersion = aap.hpo_dispersion(1, {'Visão': 8.0}, {'Visão': 64.0})
+    assert all(math.isnan(value) for value in dispersion['Visão'].values())
+    assert aap.format_stat(dispersion['Visão']['desvio_padrao']) == "—"
+    assert aap.format_interval(dispersion['Visão']['ic_inferior'], dispersion['Visão']['ic_superior']) == "—"
+
+
+def test_dispersion_two_responses():
+    # Totais 6 e 10: média 8, variância amostral 8
+    dispersion = aap.hpo_dispersion(2, {'Visão': 16.0}, {'Visão': 136.0})['Visão']
+    assert math.isclose(dispersion['desvio_padrao'], math.sqrt(8))
+    assert math.isclose(dispersion['erro_padrao'], 2.0)
+    assert math.isclose(dispersion['ic_inferior'], 8 - aap.CONFIDENCE_Z * 2)
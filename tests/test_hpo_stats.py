@@ -0,0 +1,14 @@
+import pandas as pd
+
+import aap
+
+
+def test_hpo_stats_compact_frame_with_missing_answers():
+    df = pd.DataFrame({item: [7, 5, 3] for item in aap.HPO_ITEMS})
+    df.loc[1, 'b2'] = None
+    compact = df.astype('Int8')
+
+    stats, _, _, dispersion = aap.calculate_hpo_stats(compact)
+    expected, _, _, expected_dispersion = aap.calculate_hpo_stats(df.fillna(0).astype('int64'))
+    assert stats == expected
+    assert dispersion == expected_dispersion
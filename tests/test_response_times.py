@@ -0,0 +1,27 @@
+import pandas as pd
+
+import aap
+
+
+def test_response_time_stats_empty_frame():
+    df = pd.DataFrame({'question_id': pd.Series([], dtype=object), 'response_time': pd.Series([], dtype=float)})
+    time_stats = aap.calculate_response_time_stats(df)
+    assert time_stats.empty
+    assert 'limite_atipico' in time_stats.columns
+    assert all(f"p{pct}" in time_stats.columns for pct in aap.TIME_PERCENTILES)
+
+
+def test_response_time_stats_without_times():
+    # Respostas antigas, gravadas antes de existir response_time
+    df = pd.DataFrame({'question_id': ['q1', 'q2', 'q1'], 'response_time': [None, None, None]})
+    time_stats = aap.calculate_response_time_stats(df)
+    assert time_stats.empty
+    assert list(time_stats.columns) == list(aap.calculate_response_time_stats(df.iloc[:0]).columns)
+
+
+def test_response_time_stats_ignores_missing_times():
+    df = pd.DataFrame({'question_id': ['q1', 'q1', 'q1', 'q2'], 'response_time': [2.0, 4.0, None, None]})
+    time_stats = aap.calculate_response_time_stats(df)
+    assert list(time_stats.index) == ['q1']
+    assert time_stats.loc['q1', 'respostas'] == 2
+    assert time_stats.loc['q1', 'media'] == 3.0